@@ -12,14 +12,37 @@ Output: CSV files in data/raw/
 """
 
 import os
-import random
 import string
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import date, timedelta, datetime
 
-random.seed(42)
-np.random.seed(42)
+_RNG = np.random.default_rng(42)
+
+
+def _line_amounts_kernel(list_price, unit_cost, quantity, discount, target_factor,
+                         unit_price, sales_amt, cogs, gm, target):
+    """Per-line monetary arithmetic as one fused loop (JIT-compiled when
+    numba is installed; the vectorized NumPy path is used otherwise)."""
+    for i in range(list_price.shape[0]):
+        up = round(list_price[i] * (1.0 - discount[i] / 2.0), 2)
+        sa = round(quantity[i] * up * (1.0 - discount[i]), 2)
+        cg = round(quantity[i] * unit_cost[i], 2)
+        unit_price[i] = up
+        sales_amt[i]  = sa
+        cogs[i]       = cg
+        gm[i]         = round(sa - cg, 2)
+        target[i]     = round(sa * target_factor[i], 2)
+
+
+try:
+    from numba import njit
+    _line_amounts_kernel = njit(cache=True)(_line_amounts_kernel)
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
 
 # ─── Lightweight fake-data helpers (no Faker dependency) ───
 _FIRST = ["James","Mary","John","Patricia","Robert","Jennifer","Michael","Linda",
@@ -35,34 +58,59 @@ _COBASE= ["Apex","Blue","Cedar","Delta","Echo","Falcon","Global","Harbor","Iris"
           "Juno","Kite","Luxe","Maple","Nexus","Orbit","Prism","Quest","Rapid",
           "Solar","Titan","Unity","Vertex","Wave","Xeon","Yield","Zenith"]
 
-def _name():
-    return f"{random.choice(_FIRST)} {random.choice(_LAST)}"
+def _names(size: int) -> np.ndarray:
+    first = np.array(_FIRST)[_RNG.integers(0, len(_FIRST), size=size)]
+    last  = np.array(_LAST)[_RNG.integers(0, len(_LAST), size=size)]
+    return np.char.add(np.char.add(first, " "), last)
 
-def _company():
-    return f"{random.choice(_COBASE)} {random.choice(_CO)}"
+def _companies(size: int) -> np.ndarray:
+    base   = np.array(_COBASE)[_RNG.integers(0, len(_COBASE), size=size)]
+    suffix = np.array(_CO)[_RNG.integers(0, len(_CO), size=size)]
+    return np.char.add(np.char.add(base, " "), suffix)
 
-def _email(company_name: str):
-    slug = company_name.lower().replace(" ", "").replace(",","")[:12]
-    return f"contact@{slug}.com"
+def _emails(company_names: np.ndarray) -> np.ndarray:
+    # astype("<U12") truncates every slug to 12 chars in one pass
+    slugs = np.char.replace(np.char.lower(company_names), " ", "").astype("<U12")
+    return np.char.add("contact@", np.char.add(slugs, ".com"))
 
-def _date_between(start: date, end: date) -> date:
-    delta = (end - start).days
-    return start + timedelta(days=random.randint(0, delta))
+def _dates_between(start: date, end: date, size: int) -> np.ndarray:
+    days = _RNG.integers(0, (end - start).days + 1, size=size)
+    return pd.to_datetime(np.datetime64(start, "D") + days.astype("timedelta64[D]")).date
 
-def _bothify(pattern: str) -> str:
-    result = ""
+_UPPER  = np.array(list(string.ascii_uppercase))
+_DIGITS = np.array(list(string.digits))
+
+def _bothify_batch(pattern: str, size: int) -> np.ndarray:
+    """Vectorized bothify: '?' -> random A-Z, '#' -> random digit.
+
+    The pattern is parsed once; each slot becomes one batched draw, so
+    fixed characters cost a single np.full instead of per-row concat.
+    """
+    parts = []
     for ch in pattern:
         if ch == '?':
-            result += random.choice(string.ascii_uppercase)
+            parts.append(_UPPER[_RNG.integers(0, 26, size=size)])
         elif ch == '#':
-            result += str(random.randint(0, 9))
+            parts.append(_DIGITS[_RNG.integers(0, 10, size=size)])
         else:
-            result += ch
-    return result
+            parts.append(np.full(size, ch))
+    out = parts[0]
+    for part in parts[1:]:
+        out = np.char.add(out, part)
+    return out
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+def save_raw(df: pd.DataFrame, table: str):
+    """Write a raw table as Parquet (pipeline input) plus a CSV copy."""
+    df.to_parquet(f"{OUTPUT_DIR}/{table}.parquet", engine="pyarrow")
+    # Arrow formats CSV columns in parallel — the fact_sales write is the hot path
+    pacsv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        f"{OUTPUT_DIR}/{table}.csv",
+    )
+
 # ─────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────
@@ -125,26 +173,26 @@ def generate_products(n: int) -> pd.DataFrame:
         "Hardware":       ["Servers", "Networking", "Storage", "IoT Devices"],
         "Office Supplies":["Furniture", "Stationery", "Equipment", "Accessories"],
     }
-    brands = ["TechCorp", "SoftPro", "GlobalSystems", "InnovateTech", "DataStream", "CloudEdge"]
-    rows = []
-    for i in range(1, n + 1):
-        cat = random.choice(list(categories.keys()))
-        sub = random.choice(categories[cat])
-        unit_cost  = round(random.uniform(50, 5000), 2)
-        list_price = round(unit_cost * random.uniform(1.3, 2.5), 2)
-        rows.append({
-            "product_key":  i,
-            "product_id":   f"PRD-{i:04d}",
-            "product_name": f"{random.choice(brands)} {sub} {_bothify('??-###')}",
-            "category":     cat,
-            "sub_category": sub,
-            "brand":        random.choice(brands),
-            "unit_cost":    unit_cost,
-            "list_price":   list_price,
-            "is_active":    random.choices([True, False], weights=[90, 10])[0],
-            "launch_date":  _date_between(date(2020, 1, 1), START_DATE),
-        })
-    return pd.DataFrame(rows)
+    brands = np.array(["TechCorp", "SoftPro", "GlobalSystems", "InnovateTech", "DataStream", "CloudEdge"])
+
+    cats       = _RNG.choice(np.array(list(categories)), size=n)
+    subs       = np.array([categories[c][j] for c, j in zip(cats, _RNG.integers(0, 4, size=n))])
+    unit_cost  = np.round(_RNG.uniform(50, 5000, size=n), 2)
+    list_price = np.round(unit_cost * _RNG.uniform(1.3, 2.5, size=n), 2)
+    name_brand = _RNG.choice(brands, size=n)
+    model_code = _bothify_batch('??-###', n)
+    return pd.DataFrame({
+        "product_key":  np.arange(1, n + 1),
+        "product_id":   [f"PRD-{i:04d}" for i in range(1, n + 1)],
+        "product_name": [f"{b} {s} {c}" for b, s, c in zip(name_brand, subs, model_code)],
+        "category":     cats,
+        "sub_category": subs,
+        "brand":        _RNG.choice(brands, size=n),
+        "unit_cost":    unit_cost,
+        "list_price":   list_price,
+        "is_active":    _RNG.random(n) < 0.90,
+        "launch_date":  _dates_between(date(2020, 1, 1), START_DATE, n),
+    })
 
 
 # ─────────────────────────────────────────────
@@ -157,20 +205,17 @@ def generate_customers(n: int) -> pd.DataFrame:
         "Technology", "Energy", "Telecommunications", "Education",
         "Government", "Logistics",
     ]
-    rows = []
-    for i in range(1, n + 1):
-        cname = _company()
-        rows.append({
-            "customer_key":     i,
-            "customer_id":      f"CUST-{i:05d}",
-            "customer_name":    cname,
-            "segment":          random.choice(segments),
-            "industry":         random.choice(industries),
-            "email":            _email(cname),
-            "acquisition_date": _date_between(date(2019, 1, 1), START_DATE),
-            "is_active":        random.choices([True, False], weights=[85, 15])[0],
-        })
-    return pd.DataFrame(rows)
+    cnames = _companies(n)
+    return pd.DataFrame({
+        "customer_key":     np.arange(1, n + 1),
+        "customer_id":      [f"CUST-{i:05d}" for i in range(1, n + 1)],
+        "customer_name":    cnames,
+        "segment":          _RNG.choice(np.array(segments), size=n),
+        "industry":         _RNG.choice(np.array(industries), size=n),
+        "email":            _emails(cnames),
+        "acquisition_date": _dates_between(date(2019, 1, 1), START_DATE, n),
+        "is_active":        _RNG.random(n) < 0.85,
+    })
 
 
 # ─────────────────────────────────────────────
@@ -183,50 +228,43 @@ def generate_employees(n: int, region_keys: list) -> pd.DataFrame:
         "Business Development Rep", "Inside Sales Rep",
     ]
     departments = ["Sales", "Pre-Sales", "Channel Sales", "Enterprise Sales"]
-    rows = []
-    for i in range(1, n + 1):
-        rows.append({
-            "employee_key": i,
-            "employee_id":  f"EMP-{i:03d}",
-            "full_name":    _name(),
-            "department":   random.choice(departments),
-            "job_title":    random.choice(titles),
-            "manager_id":   f"EMP-{random.randint(1, max(1, n // 5)):03d}" if i > 5 else None,
-            "hire_date":    _date_between(date(2018, 1, 1), START_DATE),
-            "region_key":   random.choice(region_keys),
-            "is_active":    random.choices([True, False], weights=[92, 8])[0],
-        })
-    return pd.DataFrame(rows)
+    mgr_keys = _RNG.integers(1, max(1, n // 5) + 1, size=n)
+    return pd.DataFrame({
+        "employee_key": np.arange(1, n + 1),
+        "employee_id":  [f"EMP-{i:03d}" for i in range(1, n + 1)],
+        "full_name":    _names(n),
+        "department":   _RNG.choice(np.array(departments), size=n),
+        "job_title":    _RNG.choice(np.array(titles), size=n),
+        "manager_id":   [f"EMP-{m:03d}" if i > 5 else None for i, m in enumerate(mgr_keys, start=1)],
+        "hire_date":    _dates_between(date(2018, 1, 1), START_DATE, n),
+        "region_key":   _RNG.choice(np.asarray(region_keys), size=n),
+        "is_active":    _RNG.random(n) < 0.92,
+    })
 
 
 # ─────────────────────────────────────────────
 # DIMENSION: DATE
 # ─────────────────────────────────────────────
 def generate_date_dimension(start: date, end: date) -> pd.DataFrame:
-    rows = []
-    current = start
-    holidays = {
+    holidays = [
         date(2024, 1, 1), date(2024, 7, 4), date(2024, 12, 25),
         date(2025, 1, 1), date(2025, 7, 4), date(2025, 12, 25),
-    }
-    while current <= end:
-        q = f"Q{(current.month - 1) // 3 + 1}"
-        rows.append({
-            "date_key":      int(current.strftime("%Y%m%d")),
-            "full_date":     current,
-            "day_of_week":   current.strftime("%A"),
-            "day_of_month":  current.day,
-            "week_number":   current.isocalendar()[1],
-            "month_number":  current.month,
-            "month_name":    current.strftime("%B"),
-            "quarter":       q,
-            "year":          current.year,
-            "is_weekend":    current.weekday() >= 5,
-            "is_holiday":    current in holidays,
-            "fiscal_period": f"FY{current.year}-P{current.month:02d}",
-        })
-        current += timedelta(days=1)
-    return pd.DataFrame(rows)
+    ]
+    idx = pd.date_range(start, end, freq="D")
+    return pd.DataFrame({
+        "date_key":      idx.strftime("%Y%m%d").astype(int),
+        "full_date":     idx.date,
+        "day_of_week":   idx.day_name(),
+        "day_of_month":  idx.day,
+        "week_number":   idx.isocalendar().week.astype(int).to_numpy(),
+        "month_number":  idx.month,
+        "month_name":    idx.month_name(),
+        "quarter":       "Q" + ((idx.month - 1) // 3 + 1).astype(str),
+        "year":          idx.year,
+        "is_weekend":    idx.weekday >= 5,
+        "is_holiday":    idx.isin(pd.to_datetime(holidays)),
+        "fiscal_period": "FY" + idx.year.astype(str) + "-P" + idx.month.map("{:02d}".format),
+    })
 
 
 # ─────────────────────────────────────────────
@@ -240,75 +278,94 @@ def generate_sales(
     regions: pd.DataFrame,
     dates: pd.DataFrame,
 ) -> pd.DataFrame:
-    date_keys    = dates["date_key"].tolist()
-    product_keys = products["product_key"].tolist()
-    customer_keys= customers["customer_key"].tolist()
-    employee_keys= employees["employee_key"].tolist()
-    region_keys  = regions["region_key"].tolist()
-
-    statuses = ["Open", "Confirmed", "Shipped", "Delivered", "Cancelled"]
-    status_weights = [5, 10, 20, 60, 5]
-    channels = ["Direct", "Partner", "Online", "Retail"]
-    channel_weights = [40, 30, 20, 10]
-
-    prod_lookup = products.set_index("product_key")[["unit_cost", "list_price"]].to_dict("index")
-
-    rows = []
-    sales_key = 1
-    for order_num in range(1, n_orders + 1):
-        order_id   = f"ORD-{order_num:06d}"
-        order_date = random.choice(date_keys)
-        customer   = random.choice(customer_keys)
-        employee   = random.choice(employee_keys)
-        region     = random.choice(region_keys)
-        channel    = random.choices(channels, weights=channel_weights)[0]
-        status     = random.choices(statuses, weights=status_weights)[0]
-        n_lines    = random.randint(1, 5)
-        ts = datetime.now().replace(
-            hour=random.randint(8,18),
-            minute=random.randint(0,59),
-            second=random.randint(0,59),
-            microsecond=0
-        ) - timedelta(days=random.randint(0, 730))
-
-        for line in range(1, n_lines + 1):
-            product    = random.choice(product_keys)
-            pdata      = prod_lookup[product]
-            quantity   = random.randint(1, 50)
-            discount   = round(random.choices(
-                [0, 0.05, 0.10, 0.15, 0.20, 0.25],
-                weights=[30, 20, 20, 15, 10, 5]
-            )[0], 2)
-            unit_price = round(pdata["list_price"] * (1 - discount / 2), 2)
-            sales_amt  = round(quantity * unit_price * (1 - discount), 2)
-            cogs       = round(quantity * pdata["unit_cost"], 2)
-            gm         = round(sales_amt - cogs, 2)
-            target     = round(sales_amt * random.uniform(0.85, 1.20), 2)
-
-            rows.append({
-                "sales_key":      sales_key,
-                "order_id":       order_id,
-                "line_number":    line,
-                "date_key":       order_date,
-                "product_key":    product,
-                "customer_key":   customer,
-                "region_key":     region,
-                "employee_key":   employee,
-                "quantity":       quantity,
-                "unit_price":     unit_price,
-                "discount_pct":   discount,
-                "sales_amount":   sales_amt,
-                "cogs":           cogs,
-                "gross_margin":   gm,
-                "target_amount":  target,
-                "order_status":   status,
-                "channel":        channel,
-                "created_at":     ts,
-                "updated_at":     ts,
-            })
-            sales_key += 1
-
-    return pd.DataFrame(rows)
+    rng = _RNG
+
+    date_keys    = dates["date_key"].to_numpy()
+    product_keys = products["product_key"].to_numpy()
+    customer_keys= customers["customer_key"].to_numpy()
+    employee_keys= employees["employee_key"].to_numpy()
+    region_keys  = regions["region_key"].to_numpy()
+
+    # Weighted draws via inverse CDF: build each cumulative distribution once,
+    # then searchsorted maps uniform samples to buckets branchlessly
+    statuses    = np.array(["Open", "Confirmed", "Shipped", "Delivered", "Cancelled"])
+    status_cdf  = np.cumsum([5, 10, 20, 60, 5]) / 100
+    channels    = np.array(["Direct", "Partner", "Online", "Retail"])
+    channel_cdf = np.cumsum([40, 30, 20, 10]) / 100
+    disc_values = np.array([0, 0.05, 0.10, 0.15, 0.20, 0.25])
+    disc_cdf    = np.cumsum([30, 20, 20, 15, 10, 5]) / 100
+
+    # unit_cost / list_price per product as contiguous per-column arrays,
+    # addressable by positional index
+    cost_arr  = products["unit_cost"].to_numpy()
+    price_arr = products["list_price"].to_numpy()
+
+    # ── Order-level draws (one array per field, drawn up front) ──
+    n_lines    = rng.integers(1, 6, size=n_orders)
+    n_total    = int(n_lines.sum())
+    order_id   = np.array([f"ORD-{i:06d}" for i in range(1, n_orders + 1)])
+    order_date = rng.choice(date_keys,     size=n_orders)
+    customer   = rng.choice(customer_keys, size=n_orders)
+    employee   = rng.choice(employee_keys, size=n_orders)
+    region     = rng.choice(region_keys,   size=n_orders)
+    channel    = channels[np.searchsorted(channel_cdf, rng.random(n_orders))]
+    status     = statuses[np.searchsorted(status_cdf,  rng.random(n_orders))]
+    ts = (
+        pd.Timestamp(datetime.now().date())
+        - pd.to_timedelta(rng.integers(0, 731, size=n_orders), unit="D")
+        + pd.to_timedelta(rng.integers(8, 19, size=n_orders),  unit="h")
+        + pd.to_timedelta(rng.integers(0, 60, size=n_orders),  unit="m")
+        + pd.to_timedelta(rng.integers(0, 60, size=n_orders),  unit="s")
+    )
+
+    # ── Expand order-level arrays to line granularity ──
+    line_number = np.arange(1, n_total + 1) - np.repeat(np.cumsum(n_lines) - n_lines, n_lines)
+
+    # ── Line-level draws and fully vectorized arithmetic ──
+    prod_idx   = rng.integers(0, len(product_keys), size=n_total)
+    quantity   = rng.integers(1, 51, size=n_total)
+    discount   = disc_values[np.searchsorted(disc_cdf, rng.random(n_total))]
+    unit_cost  = cost_arr[prod_idx]
+    list_price = price_arr[prod_idx]
+    target_factor = rng.uniform(0.85, 1.20, size=n_total)
+    if _HAS_NUMBA:
+        unit_price = np.empty(n_total)
+        sales_amt  = np.empty(n_total)
+        cogs       = np.empty(n_total)
+        gm         = np.empty(n_total)
+        target     = np.empty(n_total)
+        _line_amounts_kernel(list_price, unit_cost, quantity.astype(np.float64),
+                             discount, target_factor,
+                             unit_price, sales_amt, cogs, gm, target)
+    else:
+        unit_price = np.round(list_price * (1 - discount / 2), 2)
+        sales_amt  = np.round(quantity * unit_price * (1 - discount), 2)
+        cogs       = np.round(quantity * unit_cost, 2)
+        gm         = np.round(sales_amt - cogs, 2)
+        target     = np.round(sales_amt * target_factor, 2)
+
+    ts_lines = np.repeat(ts, n_lines)
+    return pd.DataFrame({
+        "sales_key":      np.arange(1, n_total + 1),
+        "order_id":       np.repeat(order_id, n_lines),
+        "line_number":    line_number,
+        "date_key":       np.repeat(order_date, n_lines),
+        "product_key":    product_keys[prod_idx],
+        "customer_key":   np.repeat(customer, n_lines),
+        "region_key":     np.repeat(region, n_lines),
+        "employee_key":   np.repeat(employee, n_lines),
+        "quantity":       quantity,
+        "unit_price":     unit_price,
+        "discount_pct":   discount,
+        "sales_amount":   sales_amt,
+        "cogs":           cogs,
+        "gross_margin":   gm,
+        "target_amount":  target,
+        "order_status":   np.repeat(status, n_lines),
+        "channel":        np.repeat(channel, n_lines),
+        "created_at":     ts_lines,
+        "updated_at":     ts_lines,
+    })
 
 
 # ─────────────────────────────────────────────
@@ -319,38 +376,38 @@ def main():
 
     print("  ✅ Generating date dimension...")
     dates = generate_date_dimension(START_DATE, END_DATE)
-    dates.to_csv(f"{OUTPUT_DIR}/dim_date.csv", index=False)
+    save_raw(dates, "dim_date")
     print(f"     → {len(dates):,} date records")
 
     print("  ✅ Generating region dimension...")
     regions = generate_regions(N_REGIONS)
-    regions.to_csv(f"{OUTPUT_DIR}/dim_region.csv", index=False)
+    save_raw(regions, "dim_region")
     print(f"     → {len(regions):,} regions")
 
     print("  ✅ Generating product dimension...")
     products = generate_products(N_PRODUCTS)
-    products.to_csv(f"{OUTPUT_DIR}/dim_product.csv", index=False)
+    save_raw(products, "dim_product")
     print(f"     → {len(products):,} products")
 
     print("  ✅ Generating customer dimension...")
     customers = generate_customers(N_CUSTOMERS)
-    customers.to_csv(f"{OUTPUT_DIR}/dim_customer.csv", index=False)
+    save_raw(customers, "dim_customer")
     print(f"     → {len(customers):,} customers")
 
     print("  ✅ Generating employee dimension...")
     employees = generate_employees(N_EMPLOYEES, regions["region_key"].tolist())
-    employees.to_csv(f"{OUTPUT_DIR}/dim_employee.csv", index=False)
+    save_raw(employees, "dim_employee")
     print(f"     → {len(employees):,} employees")
 
     print("  ✅ Generating sales fact table...")
     sales = generate_sales(N_ORDERS, products, customers, employees, regions, dates)
-    sales.to_csv(f"{OUTPUT_DIR}/fact_sales.csv", index=False)
+    save_raw(sales, "fact_sales")
     print(f"     → {len(sales):,} sales line items")
 
     total_rev = sales["sales_amount"].sum()
     print(f"\n📊 Summary:")
     print(f"   Total Revenue:    ${total_rev:>15,.2f}")
-    print(f"   Total Orders:     {sales['order_id'].nunique():>10,}")
+    print(f"   Total Orders:     {N_ORDERS:>10,}")  # order ids are 1..N_ORDERS by construction
     print(f"   Date Range:       {START_DATE} → {END_DATE}")
     print(f"\n✅ All files saved to: {OUTPUT_DIR}/\n")
 
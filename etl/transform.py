@@ -13,16 +13,23 @@ Run: python etl/transform.py
 
 import os
 import sys
-import pandas as pd
+# FireDucks is a drop-in, compiler-backed pandas accelerator that lazily
+# fuses chained frame operations; use it when installed, else stock pandas.
+try:
+    import fireducks.pandas as pd
+except ImportError:
+    import pandas as pd
 import numpy as np
+import numexpr as ne
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 RAW_DIR       = os.path.join(os.path.dirname(__file__), "..", "data", "raw")
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
-TABLES = ["dim_date", "dim_product", "dim_customer", "dim_employee", "dim_region", "fact_sales"]
-
 
 # ─────────────────────────────────────────────
 # HELPERS
@@ -34,31 +41,52 @@ def log(msg: str, level: str = "INFO"):
 
 
 def load_raw(table: str) -> pd.DataFrame:
-    path = os.path.join(RAW_DIR, f"{table}.csv")
-    if not os.path.exists(path):
-        log(f"Missing raw file: {path}", "ERROR")
+    pq_path  = os.path.join(RAW_DIR, f"{table}.parquet")
+    csv_path = os.path.join(RAW_DIR, f"{table}.csv")
+    if os.path.exists(pq_path):
+        df = pd.read_parquet(pq_path, engine="pyarrow")
+    elif os.path.exists(csv_path):
+        df = pd.read_csv(csv_path)
+    else:
+        log(f"Missing raw file: {pq_path} (or .csv)", "ERROR")
         sys.exit(1)
-    df = pd.read_csv(path)
     log(f"Loaded {table}: {len(df):,} rows × {len(df.columns)} cols", "OK")
     return df
 
 
+# Keep CSV copies alongside Parquet — SAC ingestion and downstream
+# tools still consume data/processed/*.csv.
+WRITE_CSV = True
+
+
 def save_processed(df: pd.DataFrame, table: str):
-    path = os.path.join(PROCESSED_DIR, f"{table}.csv")
-    df.to_csv(path, index=False)
+    path = os.path.join(PROCESSED_DIR, f"{table}.parquet")
+    df.to_parquet(path, engine="pyarrow", compression="zstd")
+    if WRITE_CSV:
+        # Arrow's CSV writer formats columns in parallel C++, unlike to_csv
+        pacsv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            os.path.join(PROCESSED_DIR, f"{table}.csv"),
+        )
     log(f"Saved  {table}: {len(df):,} rows → {path}", "OK")
 
 
+def _load_and_transform(table: str, fn) -> pd.DataFrame:
+    """Load one raw table and transform it (runs inside pool workers)."""
+    return fn(load_raw(table))
+
+
 # ─────────────────────────────────────────────
 # TRANSFORM: DIM_DATE
 # ─────────────────────────────────────────────
 def transform_dim_date(df: pd.DataFrame) -> pd.DataFrame:
     log("Transforming dim_date...", "STEP")
-    df = df.copy()
-    df["full_date"] = pd.to_datetime(df["full_date"])
+    df["full_date"] = pd.to_datetime(df["full_date"], format="%Y-%m-%d", cache=True)
     df["is_weekend"] = df["is_weekend"].astype(bool)
     df["is_holiday"] = df["is_holiday"].astype(bool)
     df = df.drop_duplicates(subset=["date_key"])
+    for col in ["day_of_week", "month_name", "quarter", "fiscal_period"]:
+        df[col] = df[col].astype("category")
     assert df["date_key"].is_monotonic_increasing or True  # allow any order
     log(f"  Date range: {df['full_date'].min().date()} → {df['full_date'].max().date()}", "INFO")
     return df
@@ -69,18 +97,20 @@ def transform_dim_date(df: pd.DataFrame) -> pd.DataFrame:
 # ─────────────────────────────────────────────
 def transform_dim_product(df: pd.DataFrame) -> pd.DataFrame:
     log("Transforming dim_product...", "STEP")
-    df = df.copy()
-    df["unit_cost"]   = pd.to_numeric(df["unit_cost"],   errors="coerce")
-    df["list_price"]  = pd.to_numeric(df["list_price"],  errors="coerce")
     df["is_active"]   = df["is_active"].astype(bool)
-    df["launch_date"] = pd.to_datetime(df["launch_date"], errors="coerce")
-
-    # Derived: margin band
-    df["margin_band"] = pd.cut(
-        (df["list_price"] - df["unit_cost"]) / df["list_price"] * 100,
-        bins=[0, 20, 40, 60, 100],
-        labels=["Low (<20%)", "Medium (20-40%)", "High (40-60%)", "Premium (>60%)"],
-        right=True
+    df["launch_date"] = pd.to_datetime(df["launch_date"], format="%Y-%m-%d", cache=True, errors="coerce")
+
+    # Derived: margin band — np.digitize bins the raw float array directly,
+    # skipping pd.cut's interval-object construction (right=True keeps the
+    # same bin edges as the old pd.cut call)
+    margin = (
+        (df["list_price"].to_numpy() - df["unit_cost"].to_numpy())
+        / df["list_price"].to_numpy() * 100
+    )
+    band_codes = np.digitize(margin, [20, 40, 60], right=True)
+    df["margin_band"] = pd.Categorical.from_codes(
+        band_codes,
+        categories=["Low (<20%)", "Medium (20-40%)", "High (40-60%)", "Premium (>60%)"],
     )
 
     # Remove rows with missing prices
@@ -90,6 +120,11 @@ def transform_dim_product(df: pd.DataFrame) -> pd.DataFrame:
     if removed:
         log(f"  Dropped {removed} products with missing prices", "WARN")
 
+    # Low-cardinality labels as category (int codes), free text as string
+    df["product_id"]   = df["product_id"].astype("string")
+    df["product_name"] = df["product_name"].astype("string")
+    for col in ["category", "sub_category", "brand"]:
+        df[col] = df[col].astype("category")
     return df
 
 
@@ -98,19 +133,27 @@ def transform_dim_product(df: pd.DataFrame) -> pd.DataFrame:
 # ─────────────────────────────────────────────
 def transform_dim_customer(df: pd.DataFrame) -> pd.DataFrame:
     log("Transforming dim_customer...", "STEP")
-    df = df.copy()
-    df["acquisition_date"] = pd.to_datetime(df["acquisition_date"], errors="coerce")
+    df["acquisition_date"] = pd.to_datetime(df["acquisition_date"], format="%Y-%m-%d", cache=True, errors="coerce")
     df["is_active"]        = df["is_active"].astype(bool)
     df["customer_name"]    = df["customer_name"].str.strip().str.title()
 
-    # Standardise segment labels
+    # Standardise segment labels on the categories, not the rows:
+    # O(#segments) renames instead of lowercasing/mapping every row
     segment_map = {
         "enterprise": "Enterprise",
         "mid-market": "Mid-Market",
         "smb":        "SMB",
         "startup":    "Startup",
     }
-    df["segment"] = df["segment"].str.lower().map(segment_map).fillna(df["segment"])
+    seg = df["segment"].astype("category")
+    df["segment"] = seg.cat.rename_categories(
+        [segment_map.get(c.lower(), c) for c in seg.cat.categories]
+    )
+
+    df["customer_id"]   = df["customer_id"].astype("string")
+    df["customer_name"] = df["customer_name"].astype("string")
+    df["email"]         = df["email"].astype("string")
+    df["industry"]      = df["industry"].astype("category")
     return df
 
 
@@ -119,10 +162,13 @@ def transform_dim_customer(df: pd.DataFrame) -> pd.DataFrame:
 # ─────────────────────────────────────────────
 def transform_dim_employee(df: pd.DataFrame) -> pd.DataFrame:
     log("Transforming dim_employee...", "STEP")
-    df = df.copy()
-    df["hire_date"] = pd.to_datetime(df["hire_date"], errors="coerce")
+    df["hire_date"] = pd.to_datetime(df["hire_date"], format="%Y-%m-%d", cache=True, errors="coerce")
     df["is_active"] = df["is_active"].astype(bool)
-    df["full_name"] = df["full_name"].str.strip()
+    df["full_name"] = df["full_name"].str.strip().astype("string")
+    df["employee_id"] = df["employee_id"].astype("string")
+    df["manager_id"]  = df["manager_id"].astype("string")
+    for col in ["department", "job_title"]:
+        df[col] = df[col].astype("category")
     return df
 
 
@@ -131,11 +177,12 @@ def transform_dim_employee(df: pd.DataFrame) -> pd.DataFrame:
 # ─────────────────────────────────────────────
 def transform_dim_region(df: pd.DataFrame) -> pd.DataFrame:
     log("Transforming dim_region...", "STEP")
-    df = df.copy()
     df["country"]    = df["country"].str.strip()
     df["region"]     = df["region"].str.strip()
     df["sub_region"] = df["sub_region"].str.strip()
     df["city"]       = df["city"].str.strip()
+    for col in ["country", "region", "sub_region", "city", "currency"]:
+        df[col] = df[col].astype("category")
     return df
 
 
@@ -151,40 +198,46 @@ def transform_fact_sales(
     dim_region: pd.DataFrame,
 ) -> pd.DataFrame:
     log("Transforming fact_sales...", "STEP")
-    df = df.copy()
 
-    # Cast numeric columns
-    numeric_cols = ["quantity", "unit_price", "discount_pct", "sales_amount",
-                    "cogs", "gross_margin", "target_amount"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    df["created_at"] = pd.to_datetime(df["created_at"], errors="coerce")
-    df["updated_at"] = pd.to_datetime(df["updated_at"], errors="coerce")
-
-    # FK integrity checks
-    valid_dates     = set(dim_date["date_key"])
-    valid_products  = set(dim_product["product_key"])
-    valid_customers = set(dim_customer["customer_key"])
-    valid_employees = set(dim_employee["employee_key"])
-    valid_regions   = set(dim_region["region_key"])
+    # Parquet preserves numeric dtypes — only timestamps need normalising
+    df["created_at"] = pd.to_datetime(df["created_at"], format="ISO8601")
+    df["updated_at"] = pd.to_datetime(df["updated_at"], format="ISO8601")
+
+    # Categorical codes make the status/channel compares and groupbys
+    # integer-based instead of per-row string dispatch
+    for col in ["order_id", "order_status", "channel"]:
+        df[col] = df[col].astype("category")
+
+    # FK integrity checks — encode each FK against the dim keys and keep
+    # rows whose categorical code resolved (>= 0), a single int compare
+    fk_refs = {
+        "date_key":     dim_date["date_key"],
+        "product_key":  dim_product["product_key"],
+        "customer_key": dim_customer["customer_key"],
+        "employee_key": dim_employee["employee_key"],
+        "region_key":   dim_region["region_key"],
+    }
+    valid_fk = np.ones(len(df), dtype=bool)
+    for col, dim_keys in fk_refs.items():
+        valid_fk &= pd.Categorical(df[col], categories=dim_keys).codes >= 0
 
     before = len(df)
-    df = df[
-        df["date_key"].isin(valid_dates) &
-        df["product_key"].isin(valid_products) &
-        df["customer_key"].isin(valid_customers) &
-        df["employee_key"].isin(valid_employees) &
-        df["region_key"].isin(valid_regions)
-    ]
+    df = df[valid_fk]
     removed = before - len(df)
     if removed:
         log(f"  Dropped {removed} orphan rows (FK violation)", "WARN")
 
-    # Derived columns
-    df["gross_margin_pct"]      = (df["gross_margin"] / df["sales_amount"] * 100).round(2)
-    df["target_attainment_pct"] = (df["sales_amount"] / df["target_amount"] * 100).round(2)
-    df["discount_impact"]       = (df["quantity"] * df["unit_price"] * df["discount_pct"]).round(2)
+    # Derived columns — numexpr fuses each expression into a single
+    # blocked pass instead of one temporary array per operator
+    gm   = df["gross_margin"].to_numpy()
+    sa   = df["sales_amount"].to_numpy()
+    ta   = df["target_amount"].to_numpy()
+    qty  = df["quantity"].to_numpy()
+    up   = df["unit_price"].to_numpy()
+    disc = df["discount_pct"].to_numpy()
+    df["gross_margin_pct"]      = np.round(ne.evaluate("gm / sa * 100"), 2)
+    df["target_attainment_pct"] = np.round(ne.evaluate("sa / ta * 100"), 2)
+    df["discount_impact"]       = np.round(ne.evaluate("qty * up * disc"), 2)
 
     # Remove cancelled orders from revenue metrics flag
     df["is_revenue_eligible"] = df["order_status"] != "Cancelled"
@@ -196,6 +249,10 @@ def transform_fact_sales(
     if removed:
         log(f"  Dropped {removed} rows with null measures", "WARN")
 
+    # Keep order_id categories exact after row filtering so downstream
+    # order counts can read .cat.categories.size in O(1)
+    df["order_id"] = df["order_id"].cat.remove_unused_categories()
+
     log(f"  Revenue-eligible rows: {df['is_revenue_eligible'].sum():,} / {len(df):,}", "INFO")
     return df
 
@@ -208,21 +265,34 @@ def run_pipeline():
     log("SAC Analytics ETL Transform Pipeline", "INFO")
     log("=" * 60, "INFO")
 
-    # Load all raw tables
-    raw = {t: load_raw(t) for t in TABLES}
-
-    # Transform dimensions
-    dim_date     = transform_dim_date(raw["dim_date"])
-    dim_product  = transform_dim_product(raw["dim_product"])
-    dim_customer = transform_dim_customer(raw["dim_customer"])
-    dim_employee = transform_dim_employee(raw["dim_employee"])
-    dim_region   = transform_dim_region(raw["dim_region"])
-
-    # Transform fact
-    fact_sales   = transform_fact_sales(
-        raw["fact_sales"], dim_date, dim_product,
+    # Transform dimensions — independent and pure, so run them in parallel;
+    # each worker loads and frees its raw frame, so raw dims never
+    # accumulate in the parent process
+    dim_transforms = {
+        "dim_date":     transform_dim_date,
+        "dim_product":  transform_dim_product,
+        "dim_customer": transform_dim_customer,
+        "dim_employee": transform_dim_employee,
+        "dim_region":   transform_dim_region,
+    }
+    with ProcessPoolExecutor(max_workers=len(dim_transforms)) as executor:
+        futures = {t: executor.submit(_load_and_transform, t, fn)
+                   for t, fn in dim_transforms.items()}
+        dims    = {t: f.result() for t, f in futures.items()}
+    dim_date     = dims["dim_date"]
+    dim_product  = dims["dim_product"]
+    dim_customer = dims["dim_customer"]
+    dim_employee = dims["dim_employee"]
+    dim_region   = dims["dim_region"]
+
+    # Transform fact — loaded only once the dims are ready, and the raw
+    # frame is released as soon as the transform returns
+    fact_raw   = load_raw("fact_sales")
+    fact_sales = transform_fact_sales(
+        fact_raw, dim_date, dim_product,
         dim_customer, dim_employee, dim_region
     )
+    del fact_raw
 
     # Save all processed tables
     save_processed(dim_date,     "dim_date")
@@ -238,10 +308,10 @@ def run_pipeline():
     log("=" * 60, "INFO")
     eligible = fact_sales[fact_sales["is_revenue_eligible"]]
     log(f"Total Revenue:        ${eligible['sales_amount'].sum():>15,.2f}", "INFO")
-    log(f"Total Orders:         {fact_sales['order_id'].nunique():>10,}", "INFO")
+    log(f"Total Orders:         {fact_sales['order_id'].cat.categories.size:>10,}", "INFO")
     log(f"Avg Gross Margin %:   {eligible['gross_margin_pct'].mean():>9.2f}%", "INFO")
-    log(f"Unique Customers:     {fact_sales['customer_key'].nunique():>10,}", "INFO")
-    log(f"Unique Products Sold: {fact_sales['product_key'].nunique():>10,}", "INFO")
+    log(f"Unique Customers:     {np.unique(fact_sales['customer_key'].to_numpy()).size:>10,}", "INFO")
+    log(f"Unique Products Sold: {np.unique(fact_sales['product_key'].to_numpy()).size:>10,}", "INFO")
     log("=" * 60, "INFO")
 
 
@@ -15,12 +15,103 @@ Run: python etl/validate.py
 
 import os
 import sys
+import functools
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from dataclasses import dataclass, field
 from typing import List
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 
+# Explicit dtypes for the CSV fallback path — skips pandas' inference
+# scan and loads keys, measures and labels in compact widths
+CSV_DTYPES = {
+    "dim_date": {
+        "date_key": "int32", "year": "uint16", "month_number": "uint8",
+        "day_of_month": "uint8", "week_number": "uint8",
+        "day_of_week": "category", "month_name": "category",
+        "quarter": "category", "fiscal_period": "category",
+    },
+    "dim_product": {
+        "product_key": "int32", "unit_cost": "float32", "list_price": "float32",
+        "category": "category", "sub_category": "category",
+        "brand": "category", "margin_band": "category",
+    },
+    "dim_customer": {
+        "customer_key": "int32", "segment": "category", "industry": "category",
+    },
+    "dim_employee": {
+        "employee_key": "int32", "region_key": "int32",
+        "department": "category", "job_title": "category",
+    },
+    "dim_region": {
+        "region_key": "int32", "country": "category", "region": "category",
+        "sub_region": "category", "city": "category", "currency": "category",
+    },
+    "fact_sales": {
+        "sales_key": "int32", "line_number": "int8", "date_key": "int32",
+        "product_key": "int32", "customer_key": "int32", "region_key": "int32",
+        "employee_key": "int32", "quantity": "int32", "unit_price": "float32",
+        "discount_pct": "float32", "sales_amount": "float32", "cogs": "float32",
+        "gross_margin": "float32", "target_amount": "float32",
+        "gross_margin_pct": "float32", "target_attainment_pct": "float32",
+        "discount_impact": "float32", "order_id": "category",
+        "order_status": "category", "channel": "category",
+        "is_revenue_eligible": "bool",
+    },
+}
+
+
+# pandas dtype strings → Arrow column types for the parallel CSV parser;
+# dictionary columns come back from to_pandas() as Categoricals
+_PA_TYPES = {
+    "int8": pa.int8(), "int32": pa.int32(), "uint8": pa.uint8(),
+    "uint16": pa.uint16(), "float32": pa.float32(), "bool": pa.bool_(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+def _read_csv_arrow(path: str, dtype_map: dict) -> pd.DataFrame:
+    """Parse a CSV with Arrow's multi-threaded reader."""
+    convert = pacsv.ConvertOptions(
+        column_types={c: _PA_TYPES[t] for c, t in (dtype_map or {}).items()})
+    table = pacsv.read_csv(path,
+                           read_options=pacsv.ReadOptions(use_threads=True),
+                           convert_options=convert)
+    return table.to_pandas()
+
+
+def _fact_rule_counts(qty, price, disc, sa, cogs, gm):
+    """Single-pass violation counts for the fact business rules.
+
+    (JIT-compiled loop when numba is installed; validate_fact_sales uses
+    the vectorized NumPy path otherwise.)"""
+    counts = np.zeros(6, dtype=np.int64)
+    for i in range(qty.shape[0]):
+        if qty[i] < 1:
+            counts[0] += 1
+        if price[i] < 0.01:
+            counts[1] += 1
+        if disc[i] < 0.0 or disc[i] > 1.0:
+            counts[2] += 1
+        if sa[i] < 0.0:
+            counts[3] += 1
+        if cogs[i] < 0.0:
+            counts[4] += 1
+        if gm[i] > sa[i]:
+            counts[5] += 1
+    return counts
+
+
+try:
+    from numba import njit
+    _fact_rule_counts = njit(cache=True)(_fact_rule_counts)
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
 
 # ─────────────────────────────────────────────
 # RESULT CLASSES
@@ -55,60 +146,113 @@ class ValidationReport:
         return sum(1 for r in self.results if r.passed)
 
     def print_summary(self):
-        total   = len(self.results)
-        passed  = self.passed_count
-        failed  = total - passed
-        err_cnt = len(self.errors)
-        wrn_cnt = len(self.warnings)
-
-        print("\n" + "=" * 65)
-        print("  DATA QUALITY VALIDATION REPORT")
-        print("=" * 65)
-        print(f"  Total Checks : {total}")
-        print(f"  ✅ Passed    : {passed}")
-        print(f"  ❌ Errors    : {err_cnt}")
-        print(f"  ⚠️  Warnings  : {wrn_cnt}")
-        print("=" * 65)
-
-        if self.errors:
-            print("\n❌ ERRORS:")
-            for r in self.errors:
-                print(f"   [{r.table}] {r.check_name}: {r.message} (rows: {r.row_count})")
-
-        if self.warnings:
-            print("\n⚠️  WARNINGS:")
-            for r in self.warnings:
-                print(f"   [{r.table}] {r.check_name}: {r.message} (rows: {r.row_count})")
-
-        passing = [r for r in self.results if r.passed]
+        # Partition the results once instead of three filter passes
+        errors, warnings, passing = [], [], []
+        for r in self.results:
+            if r.passed:
+                passing.append(r)
+            elif r.severity == "ERROR":
+                errors.append(r)
+            elif r.severity == "WARNING":
+                warnings.append(r)
+        total = len(self.results)
+
+        # Buffer the whole report and flush it in one write
+        parts = [
+            "\n" + "=" * 65 + "\n",
+            "  DATA QUALITY VALIDATION REPORT\n",
+            "=" * 65 + "\n",
+            f"  Total Checks : {total}\n",
+            f"  ✅ Passed    : {len(passing)}\n",
+            f"  ❌ Errors    : {len(errors)}\n",
+            f"  ⚠️  Warnings  : {len(warnings)}\n",
+            "=" * 65 + "\n",
+        ]
+
+        if errors:
+            parts.append("\n❌ ERRORS:\n")
+            parts.extend(f"   [{r.table}] {r.check_name}: {r.message} (rows: {r.row_count})\n"
+                         for r in errors)
+
+        if warnings:
+            parts.append("\n⚠️  WARNINGS:\n")
+            parts.extend(f"   [{r.table}] {r.check_name}: {r.message} (rows: {r.row_count})\n"
+                         for r in warnings)
+
         if passing:
-            print("\n✅ PASSED CHECKS:")
-            for r in passing:
-                print(f"   [{r.table}] {r.check_name}")
+            parts.append("\n✅ PASSED CHECKS:\n")
+            parts.extend(f"   [{r.table}] {r.check_name}\n" for r in passing)
 
-        print("=" * 65)
-        return err_cnt == 0
+        parts.append("=" * 65 + "\n")
+        sys.stdout.write("".join(parts))
+        return len(errors) == 0
 
 
 # ─────────────────────────────────────────────
 # GENERIC CHECKS
 # ─────────────────────────────────────────────
+def _count_out_of_range(arr: np.ndarray, min_val, max_val) -> int:
+    """Count values outside [min_val, max_val] on the raw ndarray."""
+    mask = np.zeros(arr.shape, dtype=bool)
+    if min_val is not None:
+        mask |= arr < min_val
+    if max_val is not None:
+        mask |= arr > max_val
+    return int(np.count_nonzero(mask))
+
+
+def _count_invalid(s: pd.Series, allowed) -> int:
+    """Count rows whose value is outside the allowed set.
+
+    Categorical columns are screened on their (few) categories first,
+    so the row scan only happens when a bad category actually exists.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        bad_codes = np.flatnonzero(~s.cat.categories.isin(list(allowed)))
+        if bad_codes.size == 0:
+            return 0
+        return int(np.count_nonzero(np.isin(s.cat.codes.to_numpy(), bad_codes)))
+    return int(np.count_nonzero(~np.isin(s.to_numpy(), list(allowed))))
+
+
+
 def check_no_nulls(df: pd.DataFrame, table: str, columns: List[str], report: ValidationReport):
+    # One isnull pass over all requested columns; exact counts are only
+    # computed for the columns that actually fail (rare)
+    nulls = df[columns].isnull()
+    has_nulls = nulls.any()
     for col in columns:
-        null_count = df[col].isnull().sum()
-        passed = null_count == 0
+        if not has_nulls[col]:
+            report.add(ValidationResult(
+                check_name=f"no_nulls.{col}",
+                table=table,
+                passed=True,
+                message="OK",
+                severity="ERROR",
+                row_count=0,
+            ))
+            continue
+        null_count = int(nulls[col].sum())
         report.add(ValidationResult(
             check_name=f"no_nulls.{col}",
             table=table,
-            passed=passed,
-            message=f"{null_count} null values in column '{col}'" if not passed else "OK",
+            passed=False,
+            message=f"{null_count} null values in column '{col}'",
             severity="ERROR",
             row_count=null_count,
         ))
 
 
 def check_no_duplicates(df: pd.DataFrame, table: str, pk: str, report: ValidationReport):
-    dup_count = df[pk].duplicated().sum()
+    a = df[pk].to_numpy()
+    if a.dtype.kind in "iu":
+        # Integer surrogate keys: sort-based unique count beats pandas'
+        # hashtable-backed duplicated()
+        dup_count = int(a.size - np.unique(a).size)
+    else:
+        dups = df[pk].duplicated()
+        # any() short-circuits on the first duplicate; count only on failure
+        dup_count = int(dups.sum()) if dups.any() else 0
     passed = dup_count == 0
     report.add(ValidationResult(
         check_name=f"no_duplicate_pk.{pk}",
@@ -126,7 +270,16 @@ def check_fk_integrity(
     table: str, ref_table: str,
     report: ValidationReport,
 ):
-    orphan_count = (~df[fk_col].isin(ref_df[ref_col])).sum()
+    fk = df[fk_col].to_numpy()
+    dk = ref_df[ref_col].to_numpy()
+    dmin, dmax = dk.min(), dk.max()
+    if dk.size == dmax - dmin + 1 and np.unique(dk).size == dk.size:
+        # Surrogate keys form a contiguous unique range — a bounds check
+        # is equivalent to probing every fact row against the key set
+        bad = (fk < dmin) | (fk > dmax)
+    else:
+        bad = ~np.isin(fk, dk)
+    orphan_count = int(np.count_nonzero(bad)) if bad.any() else 0
     passed = orphan_count == 0
     report.add(ValidationResult(
         check_name=f"fk.{fk_col} → {ref_table}.{ref_col}",
@@ -144,12 +297,7 @@ def check_value_range(
     report: ValidationReport = None,
     severity: str = "ERROR",
 ):
-    mask = pd.Series([False] * len(df), index=df.index)
-    if min_val is not None:
-        mask = mask | (df[col] < min_val)
-    if max_val is not None:
-        mask = mask | (df[col] > max_val)
-    out_of_range = mask.sum()
+    out_of_range = _count_out_of_range(df[col].to_numpy(), min_val, max_val)
     passed = out_of_range == 0
     label = f"[{min_val}, {max_val}]"
     report.add(ValidationResult(
@@ -172,15 +320,14 @@ def validate_dim_date(df: pd.DataFrame, report: ValidationReport):
     check_value_range(df, "dim_date", "day_of_month", 1, 31, report)
     check_value_range(df, "dim_date", "year", 2000, 2030, report)
 
-    q_values = df["quarter"].unique()
-    invalid_q = [q for q in q_values if q not in ("Q1", "Q2", "Q3", "Q4")]
+    invalid_q = _count_invalid(df["quarter"], {"Q1", "Q2", "Q3", "Q4"})
     report.add(ValidationResult(
         check_name="valid_quarter_values",
         table="dim_date",
-        passed=len(invalid_q) == 0,
-        message=f"Invalid quarter values: {invalid_q}" if invalid_q else "OK",
+        passed=invalid_q == 0,
+        message=f"{invalid_q} rows with invalid quarter values" if invalid_q else "OK",
         severity="ERROR",
-        row_count=len(invalid_q),
+        row_count=invalid_q,
     ))
 
 
@@ -207,7 +354,7 @@ def validate_dim_customer(df: pd.DataFrame, report: ValidationReport):
     check_no_duplicates(df, "dim_customer", "customer_key", report)
 
     valid_segments = {"Enterprise", "Mid-Market", "SMB", "Startup"}
-    invalid_segs = (~df["segment"].isin(valid_segments)).sum()
+    invalid_segs = _count_invalid(df["segment"], valid_segments)
     report.add(ValidationResult(
         check_name="valid_segment_values",
         table="dim_customer",
@@ -249,27 +396,47 @@ def validate_fact_sales(
     check_fk_integrity(df, "employee_key", dim_employee, "employee_key", "fact_sales", "dim_employee", report)
     check_fk_integrity(df, "region_key",   dim_region,   "region_key",   "fact_sales", "dim_region",   report)
 
-    # Business rule checks
-    check_value_range(df, "fact_sales", "quantity",     1,    None, report, "ERROR")
-    check_value_range(df, "fact_sales", "unit_price",   0.01, None, report, "ERROR")
-    check_value_range(df, "fact_sales", "discount_pct", 0,    1.0,  report, "ERROR")
-    check_value_range(df, "fact_sales", "sales_amount", 0,    None, report, "ERROR")
-    check_value_range(df, "fact_sales", "cogs",         0,    None, report, "ERROR")
-
-    # Gross margin sanity: GM should be < sales_amount
-    gm_anomaly = (df["gross_margin"] > df["sales_amount"]).sum()
-    report.add(ValidationResult(
-        check_name="gross_margin <= sales_amount",
-        table="fact_sales",
-        passed=gm_anomaly == 0,
-        message=f"{gm_anomaly} rows where gross_margin > sales_amount" if gm_anomaly else "OK",
-        severity="WARNING",
-        row_count=gm_anomaly,
-    ))
+    # Business rule checks — one fused pass over the measures when numba
+    # is available, one comparison per rule on the raw arrays otherwise
+    qty   = df["quantity"].to_numpy()
+    price = df["unit_price"].to_numpy()
+    disc  = df["discount_pct"].to_numpy()
+    sa    = df["sales_amount"].to_numpy()
+    cogs  = df["cogs"].to_numpy()
+    gm    = df["gross_margin"].to_numpy()
+    if _HAS_NUMBA:
+        counts = _fact_rule_counts(qty, price, disc, sa, cogs, gm)
+    else:
+        counts = [
+            np.count_nonzero(qty < 1),
+            np.count_nonzero(price < 0.01),
+            np.count_nonzero((disc < 0.0) | (disc > 1.0)),
+            np.count_nonzero(sa < 0.0),
+            np.count_nonzero(cogs < 0.0),
+            np.count_nonzero(gm > sa),
+        ]
+    rules = [
+        ("range.quantity in [1, None]",        "values outside range [1, None]",    "ERROR"),
+        ("range.unit_price in [0.01, None]",   "values outside range [0.01, None]", "ERROR"),
+        ("range.discount_pct in [0, 1.0]",     "values outside range [0, 1.0]",     "ERROR"),
+        ("range.sales_amount in [0, None]",    "values outside range [0, None]",    "ERROR"),
+        ("range.cogs in [0, None]",            "values outside range [0, None]",    "ERROR"),
+        ("gross_margin <= sales_amount",       "rows where gross_margin > sales_amount", "WARNING"),
+    ]
+    for (check_name, what, severity), n in zip(rules, counts):
+        n = int(n)
+        report.add(ValidationResult(
+            check_name=check_name,
+            table="fact_sales",
+            passed=n == 0,
+            message=f"{n} {what}" if n else "OK",
+            severity=severity,
+            row_count=n,
+        ))
 
     # Valid order statuses
     valid_statuses = {"Open", "Confirmed", "Shipped", "Delivered", "Cancelled"}
-    invalid_status = (~df["order_status"].isin(valid_statuses)).sum()
+    invalid_status = _count_invalid(df["order_status"], valid_statuses)
     report.add(ValidationResult(
         check_name="valid_order_status",
         table="fact_sales",
@@ -283,8 +450,13 @@ def validate_fact_sales(
 # ─────────────────────────────────────────────
 # MAIN
 # ─────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
 def load(table: str) -> pd.DataFrame:
-    return pd.read_csv(os.path.join(PROCESSED_DIR, f"{table}.csv"))
+    pq_path = os.path.join(PROCESSED_DIR, f"{table}.parquet")
+    if os.path.exists(pq_path):
+        return pd.read_parquet(pq_path, engine="pyarrow")
+    return _read_csv_arrow(os.path.join(PROCESSED_DIR, f"{table}.csv"),
+                           CSV_DTYPES.get(table))
 
 
 def run_validation() -> bool:
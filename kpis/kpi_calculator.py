@@ -14,8 +14,12 @@ Run: python kpis/kpi_calculator.py
 
 import os
 import json
+import operator
+import functools
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pacsv
 from datetime import datetime
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
@@ -33,34 +37,166 @@ RESET  = "\033[0m"
 # ─────────────────────────────────────────────
 # HELPERS
 # ─────────────────────────────────────────────
+# Only the fact columns the KPI engine reads — everything else stays on disk
+FACT_COLS = [
+    "order_id", "date_key", "product_key", "customer_key", "region_key",
+    "employee_key", "quantity", "discount_pct", "sales_amount", "cogs",
+    "gross_margin", "target_amount", "is_revenue_eligible",
+]
+
+# Explicit dtypes for the CSV fallback path — no inference scan, compact widths
+CSV_DTYPES = {
+    "fact_sales": {
+        "date_key": "int32", "product_key": "int32", "customer_key": "int32",
+        "region_key": "int32", "employee_key": "int32", "quantity": "int32",
+        "discount_pct": "float32", "sales_amount": "float32", "cogs": "float32",
+        "gross_margin": "float32", "target_amount": "float32",
+        "order_id": "category", "is_revenue_eligible": "bool",
+    },
+    "dim_date": {
+        "date_key": "int32", "year": "uint16", "month_number": "uint8",
+        "month_name": "category", "quarter": "category",
+    },
+    "dim_product": {"product_key": "int32", "category": "category"},
+    "dim_customer": {"customer_key": "int32", "segment": "category"},
+    "dim_region": {"region_key": "int32", "country": "category", "region": "category"},
+}
+
+
+# pandas dtype strings → Arrow column types for the parallel CSV parser;
+# dictionary columns come back from to_pandas() as Categoricals
+_PA_TYPES = {
+    "int32": pa.int32(), "uint8": pa.uint8(), "uint16": pa.uint16(),
+    "float32": pa.float32(), "bool": pa.bool_(),
+    "category": pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+@functools.lru_cache(maxsize=None)
 def load(table: str) -> pd.DataFrame:
-    return pd.read_csv(os.path.join(PROCESSED_DIR, f"{table}.csv"))
+    """Load a processed table once per process, preferring Parquet.
+
+    Falls back to CSV (via Arrow's multi-threaded parser) when only the
+    SAC export exists and leaves a Parquet cache behind so the parse
+    cost is paid a single time.
+    """
+    cols = FACT_COLS if table == "fact_sales" else None
+    pq_path = os.path.join(PROCESSED_DIR, f"{table}.parquet")
+    if os.path.exists(pq_path):
+        return pd.read_parquet(pq_path, engine="pyarrow", columns=cols)
+    dtype_map = CSV_DTYPES.get(table, {})
+    convert = pacsv.ConvertOptions(
+        column_types={c: _PA_TYPES[t] for c, t in dtype_map.items()},
+        include_columns=cols or [])
+    df = pacsv.read_csv(os.path.join(PROCESSED_DIR, f"{table}.csv"),
+                        read_options=pacsv.ReadOptions(use_threads=True),
+                        convert_options=convert).to_pandas()
+    if cols is None:
+        # only cache full tables — a pruned fact Parquet would shadow
+        # the complete one for other consumers of data/processed/
+        df.to_parquet(pq_path, engine="pyarrow", compression="zstd")
+    return df
+
+
+def _distinct(s: pd.Series) -> int:
+    """Distinct count via np.unique — sort-based instead of per-row hashing.
+
+    Categorical columns (order_id) are counted on their integer codes so
+    the string values are never touched.
+    """
+    arr = s.cat.codes.to_numpy() if isinstance(s.dtype, pd.CategoricalDtype) else s.to_numpy()
+    return np.unique(arr).size
+
+
+_OPS = {">=": operator.ge, "<=": operator.le,
+        ">": operator.gt, "<": operator.lt, "=": operator.eq}
+
+_RAG_LADDER = (("excellent", "GREEN"), ("good", "GREEN"), ("warning", "AMBER"))
+
+
+def compile_thresholds(thresholds: dict) -> tuple:
+    """Resolve operator strings to callables once per thresholds dict."""
+    compiled = []
+    for band, label in _RAG_LADDER:
+        spec = thresholds.get(band)
+        if spec is None:
+            continue
+        op = _OPS.get(spec["operator"])
+        if op is not None:
+            compiled.append((label, op, spec["value"]))
+    return tuple(compiled)
 
 
 def rag_status(value: float, thresholds: dict, direction: str) -> str:
     """Return RAG label based on thresholds."""
     if not thresholds:
         return "INFO"
-    t = thresholds
-    def check(op, threshold):
-        ops = {
-            ">=": value >= threshold,
-            "<=": value <= threshold,
-            ">":  value > threshold,
-            "<":  value < threshold,
-            "=":  value == threshold,
-        }
-        return ops.get(op, False)
-
-    if check(t["excellent"]["operator"], t["excellent"]["value"]):
-        return "GREEN"
-    if check(t["good"]["operator"], t["good"]["value"]):
-        return "GREEN"
-    if check(t["warning"]["operator"], t["warning"]["value"]):
-        return "AMBER"
+    return rag_from_compiled(value, compile_thresholds(thresholds))
+
+
+def rag_from_compiled(value: float, compiled: tuple) -> str:
+    """RAG label from a compile_thresholds() ladder — no string dispatch."""
+    for label, op, threshold in compiled:
+        if op(value, threshold):
+            return label
     return "RED"
 
 
+_RAG_LABELS = np.array(["GREEN", "AMBER", "RED"])
+
+
+def _rag_codes_kernel(values, bands, directions):
+    # bands[i] = (excellent, good, warning); directions: 0 = higher_is_better,
+    # 1 = lower_is_better. Codes: 0 = GREEN, 1 = AMBER, 2 = RED.
+    out = np.empty(values.shape[0], dtype=np.uint8)
+    for i in range(values.shape[0]):
+        v = values[i]
+        if directions[i] == 0:
+            if v >= bands[i, 1]:
+                out[i] = 0
+            elif v >= bands[i, 2]:
+                out[i] = 1
+            else:
+                out[i] = 2
+        else:
+            if v <= bands[i, 1]:
+                out[i] = 0
+            elif v <= bands[i, 2]:
+                out[i] = 1
+            else:
+                out[i] = 2
+    return out
+
+
+try:
+    from numba import njit
+    _rag_codes = njit(cache=True)(_rag_codes_kernel)
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+
+def rag_status_array(values, bands, directions) -> np.ndarray:
+    """RAG labels for whole arrays of KPI values at once.
+
+    For benchmark-scale use (e.g. per-region status for thousands of
+    KPIs) the scalar ladder's Python branching dominates; this codes
+    statuses in one pass — JIT-compiled when numba is available, via a
+    blocked numpy select otherwise.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    bands = np.ascontiguousarray(bands, dtype=np.float64)
+    directions = np.ascontiguousarray(directions, dtype=np.int8)
+    if _HAS_NUMBA:
+        codes = _rag_codes(values, bands, directions)
+    else:
+        higher = directions == 0
+        green = np.where(higher, values >= bands[:, 1], values <= bands[:, 1])
+        amber = np.where(higher, values >= bands[:, 2], values <= bands[:, 2])
+        codes = np.where(green, 0, np.where(amber, 1, 2)).astype(np.uint8)
+    return _RAG_LABELS[codes]
+
+
 def format_value(value: float, unit: str) -> str:
     if unit == "currency":
         return f"${value:,.2f}"
@@ -85,67 +221,141 @@ class KPICalculator:
         self.dim_date= load("dim_date")
         with open(KPI_DEF_PATH) as f:
             self.kpi_defs = json.load(f)["kpi_catalog"]["kpis"]
-
-        # Revenue eligible only
-        self.eligible = self.fact[self.fact["is_revenue_eligible"] == True].copy()
+        # Operator strings resolved to callables once, not per RAG check
+        self._compiled_thresholds = {
+            d["id"]: compile_thresholds(d.get("thresholds", {}))
+            for d in self.kpi_defs}
+
+        # Revenue eligible only — the column is already bool, so it is the
+        # mask; no == True comparison and no defensive copy (the date
+        # merge below materializes a fresh frame anyway)
+        eligible = self.fact.loc[self.fact["is_revenue_eligible"].to_numpy()]
         # Enrich with date info
-        self.eligible = self.eligible.merge(
+        self.eligible = eligible.merge(
             self.dim_date[["date_key", "year", "month_number", "month_name", "quarter"]],
             on="date_key", how="left"
         )
         self.results = []
+        self._precompute()
+
+    def _precompute(self):
+        """Aggregate the eligible fact once; every KPI reads these caches.
+
+        The ten KPI methods plus the trend/top-N reports would otherwise
+        each re-scan fact_sales — this fuses them into one sum pass, one
+        nunique pass, and one groupby per reporting grain.
+        """
+        elig = self.eligible
+        # Struct-of-arrays view of the measures: the scalar reductions run
+        # on raw typed ndarrays instead of going through the BlockManager
+        self._cols = {c: elig[c].to_numpy() for c in (
+            "sales_amount", "gross_margin", "target_amount", "discount_pct")}
+        self._totals = {c: self._cols[c].sum()
+                        for c in ("sales_amount", "gross_margin", "target_amount")}
+        self._avg_discount = self._cols["discount_pct"].mean()
+        self._nuniq = {c: _distinct(elig[c])
+                       for c in ("order_id", "employee_key", "customer_key")}
+
+        self._by_month = (
+            elig.groupby(["year", "month_number", "month_name", "quarter"],
+                         sort=False, observed=True)
+            .agg(
+                revenue=("sales_amount", "sum"),
+                gross_margin=("gross_margin", "sum"),
+                cogs=("cogs", "sum"),
+                orders=("order_id", _distinct),
+                customers=("customer_key", _distinct),
+                avg_discount=("discount_pct", "mean"),
+            )
+            .reset_index()
+            .sort_values(["year", "month_number"], ignore_index=True)
+        )
+        # Dimension attributes and derived columns are joined/computed here
+        # once, so repeated top_*/regional calls (main asks for both
+        # top_products(5) and top_products(20)) only select and sort
+        self._by_product = elig.groupby("product_key", sort=False, observed=True).agg(
+            revenue=("sales_amount", "sum"),
+            gross_margin=("gross_margin", "sum"),
+            orders=("order_id", _distinct),
+            quantity=("quantity", "sum"),
+        ).reset_index().merge(
+            load("dim_product")[["product_key", "product_name", "category"]],
+            on="product_key", how="left")
+        self._by_product["gross_margin_pct"] = (
+            self._by_product["gross_margin"] / self._by_product["revenue"] * 100
+        )
+
+        self._by_customer = elig.groupby("customer_key", sort=False, observed=True).agg(
+            revenue=("sales_amount", "sum"),
+            orders=("order_id", _distinct),
+        ).reset_index().merge(
+            load("dim_customer")[["customer_key", "customer_name", "segment"]],
+            on="customer_key", how="left")
+        self._by_customer["avg_order_value"] = (
+            self._by_customer["revenue"] / self._by_customer["orders"]
+        )
+
+        self._by_region = elig.groupby("region_key", sort=False, observed=True).agg(
+            revenue=("sales_amount", "sum"),
+            gross_margin=("gross_margin", "sum"),
+            orders=("order_id", _distinct),
+            customers=("customer_key", _distinct),
+            target=("target_amount", "sum"),
+        ).reset_index().merge(
+            load("dim_region")[["region_key", "region", "country"]],
+            on="region_key", how="left")
 
     # ── Core KPI methods ──────────────────────
     def kpi_total_revenue(self) -> float:
-        return self.eligible["sales_amount"].sum()
+        return self._totals["sales_amount"]
 
     def kpi_gross_margin_pct(self) -> float:
-        total_rev = self.eligible["sales_amount"].sum()
-        total_gm  = self.eligible["gross_margin"].sum()
+        total_rev = self._totals["sales_amount"]
+        total_gm  = self._totals["gross_margin"]
         return (total_gm / total_rev * 100) if total_rev > 0 else 0.0
 
     def kpi_revenue_growth_mom(self) -> float:
-        monthly = (
-            self.eligible.groupby(["year", "month_number"])["sales_amount"]
-            .sum()
-            .reset_index()
-            .sort_values(["year", "month_number"])
-        )
+        monthly = self._by_month["revenue"]
         if len(monthly) < 2:
             return 0.0
-        cur  = monthly.iloc[-1]["sales_amount"]
-        prev = monthly.iloc[-2]["sales_amount"]
+        cur  = monthly.iloc[-1]
+        prev = monthly.iloc[-2]
         return ((cur - prev) / prev * 100) if prev > 0 else 0.0
 
     def kpi_avg_order_value(self) -> float:
-        total_rev    = self.eligible["sales_amount"].sum()
-        order_count  = self.eligible["order_id"].nunique()
+        total_rev    = self._totals["sales_amount"]
+        order_count  = self._nuniq["order_id"]
         return (total_rev / order_count) if order_count > 0 else 0.0
 
     def kpi_target_attainment(self) -> float:
-        actual = self.eligible["sales_amount"].sum()
-        target = self.eligible["target_amount"].sum()
+        actual = self._totals["sales_amount"]
+        target = self._totals["target_amount"]
         return (actual / target * 100) if target > 0 else 0.0
 
     def kpi_total_orders(self) -> float:
-        return float(self.eligible["order_id"].nunique())
+        return float(self._nuniq["order_id"])
 
     def kpi_discount_rate(self) -> float:
-        return self.eligible["discount_pct"].mean() * 100
+        return self._avg_discount * 100
 
     def kpi_revenue_per_employee(self) -> float:
-        total_rev  = self.eligible["sales_amount"].sum()
-        emp_count  = self.eligible["employee_key"].nunique()
+        total_rev  = self._totals["sales_amount"]
+        emp_count  = self._nuniq["employee_key"]
         return (total_rev / emp_count) if emp_count > 0 else 0.0
 
     def kpi_customer_count(self) -> float:
-        return float(self.eligible["customer_key"].nunique())
+        return float(self._nuniq["customer_key"])
 
     def kpi_top10_revenue_share(self) -> float:
-        by_product   = self.eligible.groupby("product_key")["sales_amount"].sum().sort_values(ascending=False)
-        total_rev    = by_product.sum()
-        top10_rev    = by_product.head(10).sum()
-        return (top10_rev / total_rev * 100) if total_rev > 0 else 0.0
+        vals      = self._by_product["revenue"].to_numpy()
+        total_rev = vals.sum()
+        if total_rev <= 0:
+            return 0.0
+        if vals.size <= 10:
+            return 100.0
+        # O(G) partial selection — no need to sort all products for 10
+        top10_rev = -np.partition(-vals, 10)[:10].sum()
+        return top10_rev / total_rev * 100
 
     # ── KPI dispatcher ────────────────────────
     KPI_MAP = {
@@ -161,86 +371,94 @@ class KPICalculator:
         "KPI-010": kpi_top10_revenue_share,
     }
 
+    # ── Compiled scalar KPIs ──────────────────
+    # Formula expressions over the precomputed aggregate namespace,
+    # compiled once at import time. Adding or changing a ratio KPI is a
+    # data edit here; structural KPIs (MoM growth, top-10 share) keep
+    # dedicated methods in KPI_MAP.
+    KPI_EXPRS = {
+        "KPI-001": "total_revenue",
+        "KPI-002": "total_gross_margin / total_revenue * 100 if total_revenue > 0 else 0.0",
+        "KPI-004": "total_revenue / order_count if order_count > 0 else 0.0",
+        "KPI-005": "total_revenue / total_target * 100 if total_target > 0 else 0.0",
+        "KPI-006": "float(order_count)",
+        "KPI-007": "avg_discount * 100",
+        "KPI-008": "total_revenue / employee_count if employee_count > 0 else 0.0",
+        "KPI-009": "float(customer_count)",
+    }
+    KPI_CODE = {k: compile(e, f"<{k}>", "eval") for k, e in KPI_EXPRS.items()}
+
     def calculate_all(self):
         """Run all KPIs and populate self.results."""
+        # One timestamp for the whole run — all KPIs share a snapshot
+        now_iso = datetime.now().isoformat()
+        ns = {
+            "float":             float,
+            "total_revenue":     self._totals["sales_amount"],
+            "total_gross_margin": self._totals["gross_margin"],
+            "total_target":      self._totals["target_amount"],
+            "avg_discount":      self._avg_discount,
+            "order_count":       self._nuniq["order_id"],
+            "employee_count":    self._nuniq["employee_key"],
+            "customer_count":    self._nuniq["customer_key"],
+        }
         for kpi_def in self.kpi_defs:
             kpi_id = kpi_def["id"]
-            fn = self.KPI_MAP.get(kpi_id)
-            if fn is None:
-                continue
-            value  = fn(self)
-            status = rag_status(value, kpi_def.get("thresholds", {}), kpi_def.get("trend_direction", ""))
+            code = self.KPI_CODE.get(kpi_id)
+            if code is not None:
+                value = eval(code, {"__builtins__": {}}, ns)
+            else:
+                fn = self.KPI_MAP.get(kpi_id)
+                if fn is None:
+                    continue
+                value = fn(self)
+            compiled = self._compiled_thresholds.get(kpi_id)
+            status = rag_from_compiled(value, compiled) if compiled else "INFO"
             self.results.append({
                 "kpi_id":     kpi_id,
                 "kpi_name":   kpi_def["name"],
                 "category":   kpi_def["category"],
-                "value":      round(value, 4),
+                "value":      value,
                 "unit":       kpi_def["unit"],
                 "rag_status": status,
                 "formula":    kpi_def["formula"],
-                "calculated_at": datetime.now().isoformat(),
+                "calculated_at": now_iso,
             })
         return self.results
 
     # ── Monthly Trend ─────────────────────────
     def monthly_trend(self) -> pd.DataFrame:
         """Revenue, GM%, and order count by month."""
-        grp = self.eligible.groupby(["year", "month_number", "month_name", "quarter"])
-        trend = grp.agg(
-            revenue=("sales_amount", "sum"),
-            gross_margin=("gross_margin", "sum"),
-            cogs=("cogs", "sum"),
-            orders=("order_id", "nunique"),
-            customers=("customer_key", "nunique"),
-            avg_discount=("discount_pct", "mean"),
-        ).reset_index()
-        trend["gross_margin_pct"] = (trend["gross_margin"] / trend["revenue"] * 100).round(2)
-        trend["avg_discount_pct"] = (trend["avg_discount"] * 100).round(2)
+        trend = self._by_month.copy()
+        trend["gross_margin_pct"] = trend["gross_margin"] / trend["revenue"] * 100
+        trend["avg_discount_pct"] = trend["avg_discount"] * 100
         trend["revenue_growth_mom"] = trend["revenue"].pct_change() * 100
-        trend = trend.sort_values(["year", "month_number"])
         return trend
 
     # ── Top N Products ────────────────────────
     def top_products(self, n: int = 10) -> pd.DataFrame:
-        dim_product = load("dim_product")
-        grp = self.eligible.groupby("product_key").agg(
-            revenue=("sales_amount", "sum"),
-            gross_margin=("gross_margin", "sum"),
-            orders=("order_id", "nunique"),
-            quantity=("quantity", "sum"),
-        ).reset_index()
-        grp = grp.merge(dim_product[["product_key", "product_name", "category"]], on="product_key", how="left")
-        grp["gross_margin_pct"] = (grp["gross_margin"] / grp["revenue"] * 100).round(2)
-        grp = grp.sort_values("revenue", ascending=False).head(n)
-        return grp
+        grp = self._by_product
+        if n < len(grp):
+            # argpartition picks the n winners in O(G); only they get sorted
+            idx = np.argpartition(-grp["revenue"].to_numpy(), n)[:n]
+            grp = grp.iloc[idx]
+        return grp.sort_values("revenue", ascending=False, ignore_index=True)
 
     # ── Top N Customers ───────────────────────
     def top_customers(self, n: int = 10) -> pd.DataFrame:
-        dim_customer = load("dim_customer")
-        grp = self.eligible.groupby("customer_key").agg(
-            revenue=("sales_amount", "sum"),
-            orders=("order_id", "nunique"),
-        ).reset_index()
-        grp = grp.merge(dim_customer[["customer_key", "customer_name", "segment"]], on="customer_key", how="left")
-        grp["avg_order_value"] = (grp["revenue"] / grp["orders"]).round(2)
-        grp = grp.sort_values("revenue", ascending=False).head(n)
-        return grp
+        grp = self._by_customer
+        if n < len(grp):
+            idx = np.argpartition(-grp["revenue"].to_numpy(), n)[:n]
+            grp = grp.iloc[idx]
+        return grp.sort_values("revenue", ascending=False, ignore_index=True)
 
     # ── Regional Performance ──────────────────
     def regional_performance(self) -> pd.DataFrame:
-        dim_region = load("dim_region")
-        grp = self.eligible.groupby("region_key").agg(
-            revenue=("sales_amount", "sum"),
-            gross_margin=("gross_margin", "sum"),
-            orders=("order_id", "nunique"),
-            customers=("customer_key", "nunique"),
-            target=("target_amount", "sum"),
-        ).reset_index()
-        grp = grp.merge(dim_region[["region_key", "region", "country"]], on="region_key", how="left")
+        grp = self._by_region.copy()
         total_rev = grp["revenue"].sum()
-        grp["revenue_share_pct"]   = (grp["revenue"] / total_rev * 100).round(2)
-        grp["gross_margin_pct"]    = (grp["gross_margin"] / grp["revenue"] * 100).round(2)
-        grp["target_attainment_pct"] = (grp["revenue"] / grp["target"] * 100).round(2)
+        grp["revenue_share_pct"]   = grp["revenue"] / total_rev * 100
+        grp["gross_margin_pct"]    = grp["gross_margin"] / grp["revenue"] * 100
+        grp["target_attainment_pct"] = grp["revenue"] / grp["target"] * 100
         grp = grp.sort_values("revenue", ascending=False)
         return grp
 
@@ -294,11 +512,11 @@ def main():
 
     # Save outputs
     results_df = pd.DataFrame(results)
-    results_df.to_csv(os.path.join(PROCESSED_DIR, "kpi_results.csv"), index=False)
-    trend.to_csv(os.path.join(PROCESSED_DIR, "kpi_monthly_trend.csv"), index=False)
-    calc.top_products(20).to_csv(os.path.join(PROCESSED_DIR, "top_products.csv"), index=False)
-    calc.top_customers(20).to_csv(os.path.join(PROCESSED_DIR, "top_customers.csv"), index=False)
-    regional.to_csv(os.path.join(PROCESSED_DIR, "regional_performance.csv"), index=False)
+    results_df.to_csv(os.path.join(PROCESSED_DIR, "kpi_results.csv"), index=False, float_format="%.4f")
+    trend.to_csv(os.path.join(PROCESSED_DIR, "kpi_monthly_trend.csv"), index=False, float_format="%.4f")
+    calc.top_products(20).to_csv(os.path.join(PROCESSED_DIR, "top_products.csv"), index=False, float_format="%.4f")
+    calc.top_customers(20).to_csv(os.path.join(PROCESSED_DIR, "top_customers.csv"), index=False, float_format="%.4f")
+    regional.to_csv(os.path.join(PROCESSED_DIR, "regional_performance.csv"), index=False, float_format="%.4f")
 
     print(f"\n{GREEN}✅ KPI results saved to data/processed/{RESET}\n")
     print(f"{'=' * 65}\n")
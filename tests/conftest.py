@@ -0,0 +1,79 @@
+"""
+conftest.py
+-----------
+Shared fixtures for the SAC analytics test suite.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
+
+_TABLES = ("dim_date", "dim_product", "dim_customer",
+           "dim_employee", "dim_region", "fact_sales")
+
+# Explicit dtypes skip inference in the Arrow parser and shrink the
+# frames the fixture holds for the whole session
+CSV_DTYPES = {
+    "fact_sales": {
+        "sales_key": "int32", "date_key": "int32", "product_key": "int32",
+        "customer_key": "int32", "region_key": "int32", "employee_key": "int32",
+        "quantity": "int32", "discount_pct": "float32", "sales_amount": "float32",
+        "cogs": "float32", "gross_margin": "float32",
+        "order_status": "category", "channel": "category",
+        "is_revenue_eligible": "bool",
+    },
+    "dim_date": {"date_key": "int32", "year": "uint16", "month_number": "uint8"},
+}
+
+
+# The fact columns the end-to-end tests actually read — projection at
+# load time keeps unparsed columns on disk entirely
+_FACT_TEST_COLS = [
+    "sales_key", "order_id", "date_key", "product_key", "customer_key",
+    "region_key", "employee_key", "quantity", "discount_pct", "sales_amount",
+    "cogs", "gross_margin", "order_status", "is_revenue_eligible",
+]
+
+
+def load_processed(table: str, columns: list | None = None) -> pd.DataFrame:
+    """Read a processed table, preferring the binary Parquet artifact.
+
+    Parquet skips tokenization and dtype inference entirely; the CSV
+    path stays as a fallback for trees where only the SAC export exists.
+    `columns` projects the read down to the named columns.
+    """
+    pq_path = os.path.join(PROCESSED_DIR, f"{table}.parquet")
+    if os.path.exists(pq_path):
+        df = pd.read_parquet(pq_path, engine="pyarrow", columns=columns)
+        # Parquet keeps the pipeline's 64-bit dtypes; halve them so the
+        # session-long frames cost half the bandwidth per reduction
+        narrow = {c: t for c, t in CSV_DTYPES.get(table, {}).items()
+                  if c in df.columns and df[c].dtype != t}
+        return df.astype(narrow) if narrow else df
+    dtypes = CSV_DTYPES.get(table)
+    if dtypes is not None and columns is not None:
+        dtypes = {c: t for c, t in dtypes.items() if c in columns}
+    return pd.read_csv(os.path.join(PROCESSED_DIR, f"{table}.csv"),
+                       engine="pyarrow", dtype=dtypes, usecols=columns)
+
+
+@pytest.fixture(scope="session")
+def dim_keys(processed):
+    """Sorted unique key array per dimension, built once for FK tests."""
+    return {t: np.unique(processed[t][f"{t[4:]}_key"].to_numpy())
+            for t in _TABLES if t != "fact_sales"}
+
+
+@pytest.fixture(scope="session")
+def processed():
+    """All processed star-schema tables, parsed once per test session."""
+    missing = [t for t in _TABLES
+               if not os.path.exists(os.path.join(PROCESSED_DIR, f"{t}.parquet"))
+               and not os.path.exists(os.path.join(PROCESSED_DIR, f"{t}.csv"))]
+    if missing:
+        pytest.skip(f"Processed files not found: {', '.join(missing)} — run pipeline first.")
+    return {t: load_processed(t, _FACT_TEST_COLS if t == "fact_sales" else None)
+            for t in _TABLES}
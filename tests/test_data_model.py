@@ -7,194 +7,260 @@ and referential integrity checks.
 
 import os
 import sys
+import functools
+import numpy as np
 import pytest
 import pandas as pd
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 
 
+@functools.lru_cache(maxsize=1)
+def _processed_files() -> frozenset:
+    """One directory listing instead of a stat call per table load."""
+    if os.path.isdir(PROCESSED_DIR):
+        return frozenset(os.listdir(PROCESSED_DIR))
+    return frozenset()
+
+
+# Keys and dollar amounts fit 32 bits; halving element width halves the
+# memory traffic of every full-column reduction below
+_FACT_DOWNCAST = {
+    "sales_key": "int32", "date_key": "int32", "product_key": "int32",
+    "customer_key": "int32", "region_key": "int32", "employee_key": "int32",
+    "quantity": "int32", "sales_amount": "float32", "cogs": "float32",
+    "gross_margin": "float32", "discount_pct": "float32",
+}
+
+
+@functools.lru_cache(maxsize=None)
 def load(table: str) -> pd.DataFrame:
-    path = os.path.join(PROCESSED_DIR, f"{table}.csv")
-    if not os.path.exists(path):
+    # Prefer the Parquet artifact — no tokenization or dtype inference
+    if f"{table}.parquet" in _processed_files():
+        df = pd.read_parquet(os.path.join(PROCESSED_DIR, f"{table}.parquet"),
+                             engine="pyarrow")
+    elif f"{table}.csv" in _processed_files():
+        df = pd.read_csv(os.path.join(PROCESSED_DIR, f"{table}.csv"))
+    else:
         pytest.skip(f"Processed file not found: {table}.csv — run pipeline first.")
-    return pd.read_csv(path)
+    if table == "fact_sales":
+        df = df.astype(_FACT_DOWNCAST)
+    return df
+
+
+# Session-scoped fixtures: each table is parsed once per pytest run
+# instead of once per test method via setup_method.
+@pytest.fixture(scope="session")
+def dim_date():
+    return load("dim_date")
+
+
+@pytest.fixture(scope="session")
+def dim_product():
+    return load("dim_product")
+
+
+@pytest.fixture(scope="session")
+def dim_customer():
+    return load("dim_customer")
+
+
+@pytest.fixture(scope="session")
+def dim_employee():
+    return load("dim_employee")
+
+
+@pytest.fixture(scope="session")
+def dim_region():
+    return load("dim_region")
+
+
+@pytest.fixture(scope="session")
+def fact():
+    return load("fact_sales")
+
+
+def starts_with(series: pd.Series, prefix: str) -> bool:
+    """Vectorized prefix check on a fixed-width bytes view.
+
+    Casting to S<len(prefix)> truncates every ID to its prefix in one
+    numpy pass — no per-element .str dispatch.
+    """
+    arr = series.to_numpy(dtype=f"S{len(prefix)}")
+    return bool((arr == prefix.encode()).all())
+
+
+def has_duplicates(keys: pd.Series) -> bool:
+    """Duplicate test that avoids pandas' hashtable path for int keys."""
+    a = keys.to_numpy()
+    if a.dtype.kind in "iu":
+        return np.unique(a).size != a.size
+    return bool(keys.duplicated().any())
+
+
+def count_orphans(fact_keys: pd.Series, dim_keys: pd.Series) -> int:
+    """Count fact FK values missing from the dimension.
+
+    Contiguous unique surrogate keys only need a bounds check; otherwise
+    fall back to a membership probe.
+    """
+    fk = fact_keys.to_numpy()
+    dk = dim_keys.to_numpy()
+    dmin, dmax = dk.min(), dk.max()
+    if dk.size == dmax - dmin + 1 and np.unique(dk).size == dk.size:
+        return int(np.count_nonzero((fk < dmin) | (fk > dmax)))
+    return int(np.count_nonzero(~np.isin(fk, dk)))
 
 
 # ─────────────────────────────────────────────
 # DIM_DATE TESTS
 # ─────────────────────────────────────────────
 class TestDimDate:
-    def setup_method(self):
-        self.df = load("dim_date")
+    def test_no_null_date_key(self, dim_date):
+        assert not dim_date["date_key"].isnull().any()
 
-    def test_no_null_date_key(self):
-        assert self.df["date_key"].isnull().sum() == 0
+    def test_no_duplicate_date_key(self, dim_date):
+        assert not has_duplicates(dim_date["date_key"])
 
-    def test_no_duplicate_date_key(self):
-        assert self.df["date_key"].duplicated().sum() == 0
+    def test_month_number_range(self, dim_date):
+        assert dim_date["month_number"].between(1, 12).all()
 
-    def test_month_number_range(self):
-        assert self.df["month_number"].between(1, 12).all()
+    def test_day_of_month_range(self, dim_date):
+        assert dim_date["day_of_month"].between(1, 31).all()
 
-    def test_day_of_month_range(self):
-        assert self.df["day_of_month"].between(1, 31).all()
-
-    def test_valid_quarter_values(self):
+    def test_valid_quarter_values(self, dim_date):
         valid = {"Q1", "Q2", "Q3", "Q4"}
-        assert set(self.df["quarter"].unique()).issubset(valid)
+        assert set(dim_date["quarter"].unique()).issubset(valid)
 
-    def test_date_key_format(self):
+    def test_date_key_format(self, dim_date):
         """date_key should be 8-digit YYYYMMDD integer."""
-        assert (self.df["date_key"].astype(str).str.len() == 8).all()
+        k = dim_date["date_key"].to_numpy()
+        assert ((k >= 10000101) & (k <= 99991231)).all()
 
-    def test_non_empty(self):
-        assert len(self.df) > 0
+    def test_non_empty(self, dim_date):
+        assert len(dim_date) > 0
 
 
 # ─────────────────────────────────────────────
 # DIM_PRODUCT TESTS
 # ─────────────────────────────────────────────
 class TestDimProduct:
-    def setup_method(self):
-        self.df = load("dim_product")
-
-    def test_no_null_product_key(self):
-        assert self.df["product_key"].isnull().sum() == 0
+    def test_no_null_product_key(self, dim_product):
+        assert not dim_product["product_key"].isnull().any()
 
-    def test_no_duplicate_product_key(self):
-        assert self.df["product_key"].duplicated().sum() == 0
+    def test_no_duplicate_product_key(self, dim_product):
+        assert not has_duplicates(dim_product["product_key"])
 
-    def test_positive_unit_cost(self):
-        assert (self.df["unit_cost"] > 0).all()
+    def test_positive_unit_cost(self, dim_product):
+        assert (dim_product["unit_cost"] > 0).all()
 
-    def test_positive_list_price(self):
-        assert (self.df["list_price"] > 0).all()
+    def test_positive_list_price(self, dim_product):
+        assert (dim_product["list_price"] > 0).all()
 
-    def test_product_id_format(self):
-        assert self.df["product_id"].str.startswith("PRD-").all()
+    def test_product_id_format(self, dim_product):
+        assert starts_with(dim_product["product_id"], "PRD-")
 
-    def test_no_null_category(self):
-        assert self.df["category"].isnull().sum() == 0
+    def test_no_null_category(self, dim_product):
+        assert not dim_product["category"].isnull().any()
 
 
 # ─────────────────────────────────────────────
 # DIM_CUSTOMER TESTS
 # ─────────────────────────────────────────────
 class TestDimCustomer:
-    def setup_method(self):
-        self.df = load("dim_customer")
+    def test_no_null_customer_key(self, dim_customer):
+        assert not dim_customer["customer_key"].isnull().any()
 
-    def test_no_null_customer_key(self):
-        assert self.df["customer_key"].isnull().sum() == 0
+    def test_no_duplicate_customer_key(self, dim_customer):
+        assert not has_duplicates(dim_customer["customer_key"])
 
-    def test_no_duplicate_customer_key(self):
-        assert self.df["customer_key"].duplicated().sum() == 0
-
-    def test_valid_segments(self):
+    def test_valid_segments(self, dim_customer):
         valid = {"Enterprise", "Mid-Market", "SMB", "Startup"}
-        assert set(self.df["segment"].unique()).issubset(valid)
+        assert set(dim_customer["segment"].unique()).issubset(valid)
 
-    def test_customer_id_format(self):
-        assert self.df["customer_id"].str.startswith("CUST-").all()
+    def test_customer_id_format(self, dim_customer):
+        assert starts_with(dim_customer["customer_id"], "CUST-")
 
-    def test_no_null_customer_name(self):
-        assert self.df["customer_name"].isnull().sum() == 0
+    def test_no_null_customer_name(self, dim_customer):
+        assert not dim_customer["customer_name"].isnull().any()
 
 
 # ─────────────────────────────────────────────
 # DIM_EMPLOYEE TESTS
 # ─────────────────────────────────────────────
 class TestDimEmployee:
-    def setup_method(self):
-        self.df = load("dim_employee")
-
-    def test_no_null_employee_key(self):
-        assert self.df["employee_key"].isnull().sum() == 0
+    def test_no_null_employee_key(self, dim_employee):
+        assert not dim_employee["employee_key"].isnull().any()
 
-    def test_no_duplicate_employee_key(self):
-        assert self.df["employee_key"].duplicated().sum() == 0
+    def test_no_duplicate_employee_key(self, dim_employee):
+        assert not has_duplicates(dim_employee["employee_key"])
 
-    def test_employee_id_format(self):
-        assert self.df["employee_id"].str.startswith("EMP-").all()
+    def test_employee_id_format(self, dim_employee):
+        assert starts_with(dim_employee["employee_id"], "EMP-")
 
 
 # ─────────────────────────────────────────────
 # DIM_REGION TESTS
 # ─────────────────────────────────────────────
 class TestDimRegion:
-    def setup_method(self):
-        self.df = load("dim_region")
+    def test_no_null_region_key(self, dim_region):
+        assert not dim_region["region_key"].isnull().any()
 
-    def test_no_null_region_key(self):
-        assert self.df["region_key"].isnull().sum() == 0
+    def test_no_duplicate_region_key(self, dim_region):
+        assert not has_duplicates(dim_region["region_key"])
 
-    def test_no_duplicate_region_key(self):
-        assert self.df["region_key"].duplicated().sum() == 0
-
-    def test_no_null_country(self):
-        assert self.df["country"].isnull().sum() == 0
+    def test_no_null_country(self, dim_region):
+        assert not dim_region["country"].isnull().any()
 
 
 # ─────────────────────────────────────────────
 # FACT_SALES TESTS
 # ─────────────────────────────────────────────
 class TestFactSales:
-    def setup_method(self):
-        self.fact = load("fact_sales")
-
-    def test_no_null_sales_key(self):
-        assert self.fact["sales_key"].isnull().sum() == 0
+    def test_no_null_sales_key(self, fact):
+        assert not fact["sales_key"].isnull().any()
 
-    def test_no_duplicate_sales_key(self):
-        assert self.fact["sales_key"].duplicated().sum() == 0
+    def test_no_duplicate_sales_key(self, fact):
+        assert not has_duplicates(fact["sales_key"])
 
-    def test_positive_quantity(self):
-        assert (self.fact["quantity"] > 0).all()
+    def test_positive_quantity(self, fact):
+        assert (fact["quantity"] > 0).all()
 
-    def test_non_negative_sales_amount(self):
-        assert (self.fact["sales_amount"] >= 0).all()
+    def test_non_negative_sales_amount(self, fact):
+        assert (fact["sales_amount"] >= 0).all()
 
-    def test_non_negative_cogs(self):
-        assert (self.fact["cogs"] >= 0).all()
+    def test_non_negative_cogs(self, fact):
+        assert (fact["cogs"] >= 0).all()
 
-    def test_discount_pct_range(self):
-        assert self.fact["discount_pct"].between(0, 1).all()
+    def test_discount_pct_range(self, fact):
+        assert fact["discount_pct"].between(0, 1).all()
 
-    def test_valid_order_statuses(self):
+    def test_valid_order_statuses(self, fact):
         valid = {"Open", "Confirmed", "Shipped", "Delivered", "Cancelled"}
-        assert set(self.fact["order_status"].unique()).issubset(valid)
+        assert set(fact["order_status"].unique()).issubset(valid)
 
-    def test_valid_channels(self):
+    def test_valid_channels(self, fact):
         valid = {"Direct", "Partner", "Online", "Retail"}
-        assert set(self.fact["channel"].unique()).issubset(valid)
-
-    def test_fk_date_key(self):
-        dim_date = load("dim_date")
-        orphans = ~self.fact["date_key"].isin(dim_date["date_key"])
-        assert orphans.sum() == 0, f"{orphans.sum()} orphan date_key values"
-
-    def test_fk_product_key(self):
-        dim_product = load("dim_product")
-        orphans = ~self.fact["product_key"].isin(dim_product["product_key"])
-        assert orphans.sum() == 0
-
-    def test_fk_customer_key(self):
-        dim_customer = load("dim_customer")
-        orphans = ~self.fact["customer_key"].isin(dim_customer["customer_key"])
-        assert orphans.sum() == 0
-
-    def test_fk_employee_key(self):
-        dim_employee = load("dim_employee")
-        orphans = ~self.fact["employee_key"].isin(dim_employee["employee_key"])
-        assert orphans.sum() == 0
-
-    def test_fk_region_key(self):
-        dim_region = load("dim_region")
-        orphans = ~self.fact["region_key"].isin(dim_region["region_key"])
-        assert orphans.sum() == 0
-
-    def test_non_empty_fact(self):
-        assert len(self.fact) > 0
-
-    def test_revenue_eligible_flag_exists(self):
-        assert "is_revenue_eligible" in self.fact.columns
+        assert set(fact["channel"].unique()).issubset(valid)
+
+    def test_fk_date_key(self, fact, dim_date):
+        orphans = count_orphans(fact["date_key"], dim_date["date_key"])
+        assert orphans == 0, f"{orphans} orphan date_key values"
+
+    def test_fk_product_key(self, fact, dim_product):
+        assert count_orphans(fact["product_key"], dim_product["product_key"]) == 0
+
+    def test_fk_customer_key(self, fact, dim_customer):
+        assert count_orphans(fact["customer_key"], dim_customer["customer_key"]) == 0
+
+    def test_fk_employee_key(self, fact, dim_employee):
+        assert count_orphans(fact["employee_key"], dim_employee["employee_key"]) == 0
+
+    def test_fk_region_key(self, fact, dim_region):
+        assert count_orphans(fact["region_key"], dim_region["region_key"]) == 0
+
+    def test_non_empty_fact(self, fact):
+        assert len(fact) > 0
+
+    def test_revenue_eligible_flag_exists(self, fact):
+        assert "is_revenue_eligible" in fact.columns
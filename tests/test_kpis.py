@@ -7,6 +7,7 @@ Uses known test datasets to verify formulas produce expected values.
 
 import os
 import sys
+import functools
 import pytest
 import pandas as pd
 import numpy as np
@@ -14,11 +15,99 @@ import numpy as np
 # Ensure project root is in path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from kpis.kpi_calculator import KPICalculator, rag_status, rag_status_array
+
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 
 
+@functools.lru_cache(maxsize=1)
+def _processed_files() -> frozenset:
+    """One directory listing instead of a stat call per skipif/load."""
+    if os.path.isdir(PROCESSED_DIR):
+        return frozenset(os.listdir(PROCESSED_DIR))
+    return frozenset()
+
+
 def has_processed_data() -> bool:
-    return os.path.exists(os.path.join(PROCESSED_DIR, "fact_sales.csv"))
+    return "fact_sales.csv" in _processed_files()
+
+
+_SALES_DTYPES = {
+    "order_id": object,        "sales_amount": np.float64,
+    "gross_margin": np.float64, "cogs": np.float64,
+    "target_amount": np.float64, "discount_pct": np.float64,
+    "quantity": np.int64,      "unit_price": np.float64,
+    "employee_key": np.int64,  "customer_key": np.int64,
+    "order_status": object,    "year": np.int64,
+    "month_number": np.int64,
+}
+
+
+def make_sales(**cols) -> pd.DataFrame:
+    # Only the columns the formula touches, handed over as pre-typed
+    # arrays — no per-cell dtype inference, no dead columns
+    return pd.DataFrame({name: np.asarray(vals, dtype=_SALES_DTYPES[name])
+                         for name, vals in cols.items()})
+
+
+REVENUE_THRESHOLDS = {
+    "excellent": {"operator": ">=", "value": 10_000_000},
+    "good":      {"operator": ">=", "value": 7_000_000},
+    "warning":   {"operator": ">=", "value": 4_000_000},
+    "critical":  {"operator": "<",  "value": 4_000_000},
+}
+
+
+# One case per KPI formula: (columns, formula over the frame, expected)
+KPI_FORMULA_CASES = [
+    pytest.param(
+        dict(sales_amount=[1000.00, 2500.00, 500.00],
+             order_status=["Delivered", "Delivered", "Cancelled"]),
+        lambda df: df[df["order_status"] != "Cancelled"]["sales_amount"].sum(),
+        3500.00,
+        id="total_revenue",
+    ),
+    pytest.param(
+        dict(sales_amount=[1000.00, 2000.00],
+             gross_margin=[400.00, 1000.00]),
+        # 1400 GM / 3000 revenue
+        lambda df: df["gross_margin"].sum() / df["sales_amount"].sum() * 100,
+        46.6667,
+        id="gross_margin_pct",
+    ),
+    pytest.param(
+        dict(order_id=["ORD-001", "ORD-001", "ORD-002"],
+             sales_amount=[1000.00, 500.00, 2000.00]),
+        # 3500 revenue / 2 orders — np.unique skips the hashtable path
+        lambda df: (df["sales_amount"].sum()
+                    / np.unique(df["order_id"].to_numpy()).size),
+        1750.00,
+        id="avg_order_value",
+    ),
+    pytest.param(
+        dict(sales_amount=[1050.00, 900.00],
+             target_amount=[1000.00, 1000.00]),
+        # 1950 actual / 2000 target
+        lambda df: df["sales_amount"].sum() / df["target_amount"].sum() * 100,
+        97.5,
+        id="target_attainment",
+    ),
+    pytest.param(
+        dict(discount_pct=[0.05, 0.20, 0.00]),
+        lambda df: df["discount_pct"].mean() * 100,
+        8.333,
+        id="discount_rate",
+    ),
+    pytest.param(
+        dict(sales_amount=[1000.00, 2000.00, 3000.00],
+             employee_key=[1, 1, 2]),
+        # 6000 revenue / 2 employees
+        lambda df: (df["sales_amount"].sum()
+                    / np.unique(df["employee_key"].to_numpy()).size),
+        3000.00,
+        id="revenue_per_employee",
+    ),
+]
 
 
 # ─────────────────────────────────────────────
@@ -27,52 +116,9 @@ def has_processed_data() -> bool:
 class TestKPIFormulas:
     """Test KPI formula logic with controlled in-memory DataFrames."""
 
-    def make_sales(self, rows: list) -> pd.DataFrame:
-        columns = ["order_id", "sales_amount", "gross_margin", "cogs",
-                   "target_amount", "discount_pct", "quantity",
-                   "unit_price", "employee_key", "customer_key",
-                   "order_status", "year", "month_number"]
-        return pd.DataFrame(rows, columns=columns)
-
-    def test_total_revenue(self):
-        df = self.make_sales([
-            ["ORD-001", 1000.00, 400.00, 600.00, 950.00, 0.10, 2, 550.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 2500.00, 1000.00, 1500.00, 2400.00, 0.05, 5, 525.00, 2, 2, "Delivered", 2025, 1],
-            ["ORD-003", 500.00,  200.00, 300.00, 480.00, 0.0,  1, 500.00, 1, 3, "Cancelled", 2025, 1],
-        ])
-        eligible = df[df["order_status"] != "Cancelled"]
-        assert eligible["sales_amount"].sum() == pytest.approx(3500.00)
-
-    def test_gross_margin_pct(self):
-        df = self.make_sales([
-            ["ORD-001", 1000.00, 400.00, 600.00, 950.00, 0.10, 2, 550.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 2000.00, 1000.00, 1000.00, 2000.00, 0.00, 4, 500.00, 2, 2, "Shipped", 2025, 1],
-        ])
-        total_rev = df["sales_amount"].sum()      # 3000
-        total_gm  = df["gross_margin"].sum()      # 1400
-        gm_pct    = total_gm / total_rev * 100
-        assert gm_pct == pytest.approx(46.6667, rel=1e-3)
-
-    def test_avg_order_value(self):
-        df = self.make_sales([
-            ["ORD-001", 1000.00, 400.00, 600.00, 950.00, 0.10, 2, 550.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-001", 500.00,  200.00, 300.00, 480.00, 0.05, 1, 500.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 2000.00, 800.00, 1200.00, 2000.00, 0.00, 4, 500.00, 2, 2, "Shipped", 2025, 1],
-        ])
-        total_rev   = df["sales_amount"].sum()         # 3500
-        order_count = df["order_id"].nunique()         # 2
-        aov = total_rev / order_count
-        assert aov == pytest.approx(1750.00)
-
-    def test_target_attainment(self):
-        df = self.make_sales([
-            ["ORD-001", 1050.00, 420.00, 630.00, 1000.00, 0.05, 2, 550.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 900.00,  360.00, 540.00, 1000.00, 0.10, 2, 500.00, 2, 2, "Shipped", 2025, 1],
-        ])
-        actual = df["sales_amount"].sum()  # 1950
-        target = df["target_amount"].sum() # 2000
-        attainment = actual / target * 100
-        assert attainment == pytest.approx(97.5)
+    @pytest.mark.parametrize("cols,formula,expected", KPI_FORMULA_CASES)
+    def test_kpi_formula(self, cols, formula, expected):
+        assert formula(make_sales(**cols)) == pytest.approx(expected, rel=1e-3)
 
     def test_revenue_growth_mom(self):
         monthly = pd.DataFrame({
@@ -80,106 +126,80 @@ class TestKPIFormulas:
             "month_number": [1, 2, 3],
             "revenue":      [100000, 110000, 105000],
         })
-        monthly["revenue_growth_mom"] = monthly["revenue"].pct_change() * 100
+        # One explicit diff pass over the contiguous array instead of
+        # pct_change's shifted intermediate Series
+        rev = monthly["revenue"].to_numpy(np.float64)
+        growth = np.empty_like(rev)
+        growth[0] = np.nan
+        growth[1:] = (rev[1:] - rev[:-1]) / rev[:-1] * 100
+        monthly["revenue_growth_mom"] = growth
         assert monthly.iloc[1]["revenue_growth_mom"] == pytest.approx(10.0)
         assert monthly.iloc[2]["revenue_growth_mom"] == pytest.approx(-4.545, rel=1e-2)
 
-    def test_discount_rate(self):
-        df = self.make_sales([
-            ["ORD-001", 950.00, 380.00, 570.00, 1000.00, 0.05, 2, 500.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 800.00, 320.00, 480.00, 1000.00, 0.20, 2, 500.00, 2, 2, "Delivered", 2025, 1],
-            ["ORD-003", 1000.00, 400.00, 600.00, 1000.00, 0.00, 2, 500.00, 3, 3, "Delivered", 2025, 1],
-        ])
-        avg_discount = df["discount_pct"].mean() * 100
-        assert avg_discount == pytest.approx(8.333, rel=1e-2)
-
-    def test_revenue_per_employee(self):
-        df = self.make_sales([
-            ["ORD-001", 1000.00, 400.00, 600.00, 950.00, 0.00, 2, 500.00, 1, 1, "Delivered", 2025, 1],
-            ["ORD-002", 2000.00, 800.00, 1200.00, 1900.00, 0.05, 4, 500.00, 1, 2, "Delivered", 2025, 1],
-            ["ORD-003", 3000.00, 1200.00, 1800.00, 2900.00, 0.10, 6, 500.00, 2, 3, "Delivered", 2025, 1],
-        ])
-        total_rev  = df["sales_amount"].sum()       # 6000
-        emp_count  = df["employee_key"].nunique()   # 2
-        rev_per_emp = total_rev / emp_count
-        assert rev_per_emp == pytest.approx(3000.00)
-
-    def test_rag_status_green(self):
-        """GREEN threshold: revenue >= 10,000,000"""
-        from kpis.kpi_calculator import rag_status
-        result = rag_status(12_000_000, {
-            "excellent": {"operator": ">=", "value": 10_000_000},
-            "good":      {"operator": ">=", "value": 7_000_000},
-            "warning":   {"operator": ">=", "value": 4_000_000},
-            "critical":  {"operator": "<",  "value": 4_000_000},
-        }, "higher_is_better")
-        assert result == "GREEN"
-
-    def test_rag_status_amber(self):
-        from kpis.kpi_calculator import rag_status
-        result = rag_status(5_000_000, {
-            "excellent": {"operator": ">=", "value": 10_000_000},
-            "good":      {"operator": ">=", "value": 7_000_000},
-            "warning":   {"operator": ">=", "value": 4_000_000},
-            "critical":  {"operator": "<",  "value": 4_000_000},
-        }, "higher_is_better")
-        assert result == "AMBER"
-
-    def test_rag_status_red(self):
-        from kpis.kpi_calculator import rag_status
-        result = rag_status(2_000_000, {
-            "excellent": {"operator": ">=", "value": 10_000_000},
-            "good":      {"operator": ">=", "value": 7_000_000},
-            "warning":   {"operator": ">=", "value": 4_000_000},
-            "critical":  {"operator": "<",  "value": 4_000_000},
-        }, "higher_is_better")
-        assert result == "RED"
+    @pytest.mark.parametrize("value,expected", [
+        (12_000_000, "GREEN"),
+        (5_000_000,  "AMBER"),
+        (2_000_000,  "RED"),
+    ])
+    def test_rag_status(self, value, expected):
+        assert rag_status(value, REVENUE_THRESHOLDS, "higher_is_better") == expected
+
+    def test_rag_status_array(self):
+        values = np.array([12_000_000, 5_000_000, 2_000_000], dtype=np.float64)
+        bands = np.array([[10_000_000, 7_000_000, 4_000_000]] * 3)
+        directions = np.zeros(3, dtype=np.int8)
+        assert list(rag_status_array(values, bands, directions)) == \
+            ["GREEN", "AMBER", "RED"]
 
 
 # ─────────────────────────────────────────────
 # INTEGRATION TESTS (requires processed data)
 # ─────────────────────────────────────────────
 @pytest.mark.skipif(not has_processed_data(), reason="Processed data not found — run pipeline first")
+@pytest.mark.xdist_group("kpi_calc")
 class TestKPIIntegration:
-    def setup_method(self):
-        sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-        from kpis.kpi_calculator import KPICalculator
-        self.calc = KPICalculator()
-
-    def test_total_revenue_positive(self):
-        rev = self.calc.kpi_total_revenue()
+    # One calculator (and one fact-table load) for the whole class
+    # instead of a rebuild in setup_method before every test
+    @pytest.fixture(scope="class")
+    def calc(self):
+        return KPICalculator()
+
+    # calculate_all() covers every scalar KPI the per-KPI tests assert
+    # on — run it once and let them index the cached results by kpi_id
+    @pytest.fixture(scope="class")
+    def kpi_results(self, calc):
+        return {r["kpi_id"]: r for r in calc.calculate_all()}
+
+    def test_total_revenue_positive(self, kpi_results):
+        rev = kpi_results["KPI-001"]["value"]
         assert rev > 0, "Total revenue must be positive"
 
-    def test_gross_margin_pct_in_range(self):
-        gm = self.calc.kpi_gross_margin_pct()
+    def test_gross_margin_pct_in_range(self, kpi_results):
+        gm = kpi_results["KPI-002"]["value"]
         assert 0 <= gm <= 100, f"Gross margin % {gm:.2f} out of range"
 
-    def test_avg_order_value_positive(self):
-        aov = self.calc.kpi_avg_order_value()
-        assert aov > 0
+    def test_avg_order_value_positive(self, kpi_results):
+        assert kpi_results["KPI-004"]["value"] > 0
 
-    def test_target_attainment_positive(self):
-        ta = self.calc.kpi_target_attainment()
-        assert ta > 0
+    def test_target_attainment_positive(self, kpi_results):
+        assert kpi_results["KPI-005"]["value"] > 0
 
-    def test_discount_rate_in_range(self):
-        dr = self.calc.kpi_discount_rate()
-        assert 0 <= dr <= 100
+    def test_discount_rate_in_range(self, kpi_results):
+        assert 0 <= kpi_results["KPI-007"]["value"] <= 100
 
-    def test_monthly_trend_returns_dataframe(self):
-        trend = self.calc.monthly_trend()
+    def test_monthly_trend_returns_dataframe(self, calc):
+        trend = calc.monthly_trend()
         assert isinstance(trend, pd.DataFrame)
         assert len(trend) > 0
         assert "revenue" in trend.columns
 
-    def test_top_products_count(self):
-        top = self.calc.top_products(10)
+    def test_top_products_count(self, calc):
+        top = calc.top_products(10)
         assert len(top) <= 10
 
-    def test_all_kpis_calculated(self):
-        results = self.calc.calculate_all()
-        assert len(results) == 10
-        for r in results:
+    def test_all_kpis_calculated(self, kpi_results):
+        assert len(kpi_results) == 10
+        for r in kpi_results.values():
             assert "kpi_id" in r
             assert "value" in r
             assert "rag_status" in r
@@ -7,21 +7,29 @@ Asserts processed data meets quality thresholds for SAC ingestion.
 
 import os
 import sys
+import functools
+import numpy as np
 import pytest
 import pandas as pd
+import pyarrow.parquet as pq
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
 
+# Let DataFrame.eval dispatch to numexpr: fused, blocked evaluation
+# instead of one float64 temporary per operand
+pd.set_option("compute.use_numexpr", True)
 
-def has_processed_data() -> bool:
-    return os.path.exists(os.path.join(PROCESSED_DIR, "fact_sales.csv"))
+
+@functools.lru_cache(maxsize=1)
+def _processed_files() -> frozenset:
+    """One directory listing instead of a stat call per skipif/check."""
+    if os.path.isdir(PROCESSED_DIR):
+        return frozenset(os.listdir(PROCESSED_DIR))
+    return frozenset()
 
 
-def load(table: str) -> pd.DataFrame:
-    path = os.path.join(PROCESSED_DIR, f"{table}.csv")
-    if not os.path.exists(path):
-        pytest.skip(f"File not found: {table}.csv — run pipeline first.")
-    return pd.read_csv(path)
+def has_processed_data() -> bool:
+    return "fact_sales.csv" in _processed_files()
 
 
 @pytest.mark.skipif(not has_processed_data(), reason="Processed data not found")
@@ -31,59 +39,79 @@ class TestEndToEndValidation:
         tables = ["dim_date", "dim_product", "dim_customer",
                   "dim_employee", "dim_region", "fact_sales"]
         for t in tables:
-            assert os.path.exists(os.path.join(PROCESSED_DIR, f"{t}.csv")), \
+            assert f"{t}.csv" in _processed_files(), \
                 f"Missing processed file: {t}.csv"
 
-    def test_fact_sales_row_count(self):
+    def test_fact_sales_row_count(self, processed):
         """Must have meaningful data — not just a few rows."""
-        df = load("fact_sales")
+        df = processed["fact_sales"]
         assert len(df) >= 1000, f"fact_sales has only {len(df)} rows — expected >= 1000"
 
-    def test_null_rate_below_threshold(self):
+    def test_null_rate_below_threshold(self, processed):
         """No critical column should exceed 1% nulls."""
-        df = load("fact_sales")
         critical_cols = ["sales_key", "order_id", "date_key", "product_key",
                          "customer_key", "region_key", "employee_key",
                          "sales_amount", "quantity"]
-        for col in critical_cols:
-            null_rate = df[col].isnull().mean()
-            assert null_rate < 0.01, \
-                f"Column '{col}' has {null_rate:.1%} nulls (threshold: 1%)"
-
-    def test_cancelled_orders_excluded_from_revenue_flag(self):
-        df = load("fact_sales")
-        cancelled = df[df["order_status"] == "Cancelled"]
-        if len(cancelled) > 0:
-            # is_revenue_eligible should be False for cancelled
-            ineligible = cancelled["is_revenue_eligible"]
-            assert not ineligible.any(), \
-                "Some cancelled orders have is_revenue_eligible=True"
-
-    def test_date_dimension_coverage(self):
+        rates = self._null_rates(processed, critical_cols)
+        bad = rates[rates >= 0.01]
+        assert bad.empty, f"Columns over 1% null threshold: {bad.to_dict()}"
+
+    @staticmethod
+    def _null_rates(processed, cols):
+        # The Parquet footer records per-column null counts (written from
+        # the Arrow validity bitmaps) — read the statistics instead of
+        # rescanning the rows. CSV-only trees keep the one-pass bitmap scan.
+        if "fact_sales.parquet" in _processed_files():
+            meta = pq.ParquetFile(
+                os.path.join(PROCESSED_DIR, "fact_sales.parquet")).metadata
+            nulls = dict.fromkeys(cols, 0)
+            stats_set = True
+            for rg in range(meta.num_row_groups):
+                group = meta.row_group(rg)
+                for i in range(group.num_columns):
+                    col = group.column(i)
+                    if col.path_in_schema in nulls:
+                        if not col.is_stats_set:
+                            stats_set = False
+                            break
+                        nulls[col.path_in_schema] += col.statistics.null_count
+            if stats_set:
+                return pd.Series(nulls, dtype=np.float64) / meta.num_rows
+        return processed["fact_sales"][cols].isnull().mean()
+
+    def test_cancelled_orders_excluded_from_revenue_flag(self, processed):
+        df = processed["fact_sales"]
+        # is_revenue_eligible should be False for cancelled — fused mask,
+        # no materialized copy of the cancelled rows
+        bad = (df["order_status"].eq("Cancelled") & df["is_revenue_eligible"]).any()
+        assert not bad, "Some cancelled orders have is_revenue_eligible=True"
+
+    def test_date_dimension_coverage(self, processed, dim_keys):
         """All date_keys in fact must exist in dim_date."""
-        fact = load("fact_sales")
-        dim  = load("dim_date")
-        missing = ~fact["date_key"].isin(dim["date_key"])
-        assert missing.sum() == 0, \
-            f"{missing.sum()} fact rows have no matching date in dim_date"
-
-    def test_revenue_greater_than_zero(self):
-        df = load("fact_sales")
-        eligible = df[df["is_revenue_eligible"] == True]
-        assert eligible["sales_amount"].sum() > 0
-
-    def test_gross_margin_consistency(self):
-        df = load("fact_sales")
-        # gross_margin should equal sales_amount - cogs (within float tolerance)
-        calc_gm = (df["sales_amount"] - df["cogs"]).round(2)
-        match = (calc_gm - df["gross_margin"].round(2)).abs() < 1.0  # $1 tolerance
+        fact_keys = processed["fact_sales"]["date_key"].to_numpy()
+        missing = int(np.isin(fact_keys, dim_keys["dim_date"], invert=True).sum())
+        assert missing == 0, \
+            f"{missing} fact rows have no matching date in dim_date"
+
+    def test_revenue_greater_than_zero(self, processed):
+        df = processed["fact_sales"]
+        # Branchless masked reduction — no materialized eligible-rows copy
+        sa = df["sales_amount"].to_numpy()
+        mask = df["is_revenue_eligible"].to_numpy()
+        assert (sa * mask).sum() > 0
+
+    def test_gross_margin_consistency(self, processed):
+        df = processed["fact_sales"]
+        # gross_margin should equal sales_amount - cogs (within $1 tolerance);
+        # eval fuses subtract + abs + compare into one numexpr pass
+        match = df.eval("abs(sales_amount - cogs - gross_margin) < 1.0")
         assert match.mean() > 0.99, \
             f"gross_margin inconsistent with sales_amount - cogs in {(~match).sum()} rows"
 
     def test_kpi_results_file_exists(self):
         """kpi_results.csv must exist after calculator run."""
         path = os.path.join(PROCESSED_DIR, "kpi_results.csv")
-        if not os.path.exists(path):
+        if "kpi_results.csv" not in _processed_files():
             pytest.skip("kpi_results.csv not found — run kpi_calculator.py first.")
         df = pd.read_csv(path)
         assert len(df) == 10, f"Expected 10 KPI results, got {len(df)}"
@@ -92,21 +120,21 @@ class TestEndToEndValidation:
 
     def test_monthly_trend_file_exists(self):
         path = os.path.join(PROCESSED_DIR, "kpi_monthly_trend.csv")
-        if not os.path.exists(path):
+        if "kpi_monthly_trend.csv" not in _processed_files():
             pytest.skip("kpi_monthly_trend.csv not found — run kpi_calculator.py first.")
         df = pd.read_csv(path)
         assert len(df) >= 12, "Expected at least 12 months of trend data"
 
     def test_top_products_file_exists(self):
         path = os.path.join(PROCESSED_DIR, "top_products.csv")
-        if not os.path.exists(path):
+        if "top_products.csv" not in _processed_files():
             pytest.skip("top_products.csv not found — run kpi_calculator.py first.")
         df = pd.read_csv(path)
         assert len(df) > 0
 
     def test_regional_performance_file_exists(self):
         path = os.path.join(PROCESSED_DIR, "regional_performance.csv")
-        if not os.path.exists(path):
+        if "regional_performance.csv" not in _processed_files():
             pytest.skip("regional_performance.csv not found.")
         df = pd.read_csv(path)
         assert "revenue_share_pct" in df.columns